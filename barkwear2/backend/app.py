@@ -1,6 +1,5 @@
 from flask import Flask, request, jsonify
 from flask_cors import CORS
-from ultralytics import YOLO
 import base64
 import cv2
 import numpy as np
@@ -8,14 +7,26 @@ from io import BytesIO
 from PIL import Image
 import datetime
 import os
-import face_recognition
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
-from barkwear2.utils.db import init_db, db
+from barkwear2.utils.db import init_db
 from barkwear2.routes.schedules_crud import schedule_bp
 from barkwear2.routes.students import students_bp
 from barkwear2.config import Config
+from barkwear2.services.face_gallery import match_with_fallback
+from barkwear2.services.face_db import face_db
+from barkwear2.services.roster_cache import roster_cache
+from barkwear2.services.face_tracker import FaceTracker
+from barkwear2.services.embedding_backends import get_embedding_backend
+from barkwear2.services.face_localizer import CaptureFaceLocalizer
+from barkwear2.services.face_gate import FacePresenceGate
+from barkwear2.services.micro_batcher import MicroBatcher
+from barkwear2.services.model_registry import model_registry
+from barkwear2.services.scene_cache import scene_cache
+from barkwear2.services.frame_preprocess import decode_frame
 
 app = Flask(__name__)
 CORS(app)
@@ -23,104 +34,172 @@ CORS(app)
 app.register_blueprint(schedule_bp)
 app.register_blueprint(students_bp)
 
-# ✅ Model Configuration
-MODEL_PATH = r'C:\Users\Aron\Desktop\Barkwear2\barkwear2\uniform-training\runs\detect\uniform_detector_v2\weights\best.pt'
-model = YOLO(MODEL_PATH)
-model.fuse()
-
-REQUIRED_UNIFORM_ITEMS = ['shoes', 'blue_polo', 'black_pants']
-
-# 🆕 Adjustable Face Recognition Settings
-FACE_RECOGNITION_THRESHOLD = 0.6  # Lower = more lenient (0.4-0.7 range)
-FACE_MIN_SIZE = 0.02  # Minimum 2% of image (was 5%, too strict)
-
-_face_db: list[dict] = []
-
+# ✅ Model Configuration (PyTorch best.pt or its ONNX / OpenVINO export, see Config)
+MODEL_PATH = Config.uniform_model_path()
+YOLO_CONFIDENCE = 0.5
+
+
+def load_uniform_model():
+    from ultralytics import YOLO  # imported here so spawned encoding workers (see face_encoder) stay light
+    model = YOLO(MODEL_PATH, task='detect')
+    if MODEL_PATH.endswith('.pt'):
+        model.fuse()  # exported models are already fused
+    return model
+
+
+# Built on first use or by the startup warm-up (Config.MODEL_WARMUP); the dummy
+# frame makes the first real /detect skip lazy initialisation
+model_registry.register(
+    'uniform_detector',
+    load_uniform_model,
+    priority=0,  # every /detect frame needs it, so it warms before the face models
+    warm_up=lambda model: model(np.zeros((Config.FRAME_HEIGHT, Config.FRAME_WIDTH, 3), dtype=np.uint8),
+                                verbose=False)
+)
+
+
+def uniform_model():
+    return model_registry.get('uniform_detector')
+
+
+# Concurrent /detect requests share batched forward passes instead of each
+# running a batch of one (results come back one per image, in order)
+yolo_batcher = MicroBatcher(
+    lambda images: uniform_model()(images, conf=YOLO_CONFIDENCE, verbose=False),
+    max_batch=Config.YOLO_MAX_BATCH,
+    max_wait_ms=Config.YOLO_MAX_WAIT_MS,
+    name='yolo-batcher',
+    result_timeout=Config.YOLO_RESULT_TIMEOUT
+) if Config.YOLO_BATCHING else None
+
+
+# YOLO and face identification are independent and both spend their time in
+# native code that releases the GIL, so /detect runs the uniform pass here
+# while the request thread does face identification
+stage_executor = ThreadPoolExecutor(
+    max_workers=Config.DETECT_STAGE_WORKERS,
+    thread_name_prefix='detect-stage'
+) if Config.DETECT_PARALLEL_STAGES else None
+
+
+def run_uniform_model(image):
+    """YOLO results for one frame, through the micro-batcher when enabled"""
+    if yolo_batcher is None:
+        return uniform_model()(image, conf=YOLO_CONFIDENCE, verbose=False)
+    return [yolo_batcher.submit(image)]
+
+
+def detect_uniform(image):
+    """Uniform items in one frame, highest-confidence box per class"""
+    detections = []
+    for result in run_uniform_model(image):
+        for box in result.boxes:
+            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
+            confidence = float(box.conf[0].cpu().numpy())
+            class_id = int(box.cls[0].cpu().numpy())
+            class_name = result.names[class_id]
+            detections.append({
+                'class': class_name,
+                'confidence': confidence,
+                'bbox': [float(x1), float(y1), float(x2), float(y2)]
+            })
 
-def get_student_name_from_db(student_id: str) -> str:
-    """Look up a student's full name from the database by their ID."""
-    try:
-        row = db.execute_one(
-            "SELECT first_name, middle_name, last_name FROM students WHERE student_id = %s",
-            (student_id,)
-        )
-        if row:
-            parts = [row['first_name']]
-            if row.get('middle_name'):
-                parts.append(row['middle_name'])
-            parts.append(row['last_name'])
-            return ' '.join(parts)
-    except Exception as e:
-        print(f"⚠️ DB lookup failed for {student_id}: {e}")
-    return ''
+    # Deduplicate
+    seen_classes: dict = {}
+    for det in sorted(detections, key=lambda d: d['confidence'], reverse=True):
+        cls = det['class']
+        if cls not in seen_classes:
+            seen_classes[cls] = det
+    return list(seen_classes.values())
 
 
-def reload_face_db():
-    """Load face encodings from student photo folder"""
-    global _face_db
-    _face_db = []
+def timed(fn, *args, **kwargs):
+    """(result, elapsed ms) of fn(*args, **kwargs)"""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
 
-    photo_root = Config.STUDENT_PHOTO_FOLDER
-    if not os.path.isdir(photo_root):
-        print(f"⚠️ Student photo folder not found: {photo_root}")
-        return
+REQUIRED_UNIFORM_ITEMS = ['shoes', 'blue_polo', 'black_pants']
 
-    for folder_name in os.listdir(photo_root):
-        folder_path = os.path.join(photo_root, folder_name)
-        if not os.path.isdir(folder_path):
-            continue
+# 🆕 Adjustable Face Recognition Settings
+face_backend = get_embedding_backend()  # Config.FACE_EMBEDDING_BACKEND
+FACE_RECOGNITION_THRESHOLD = face_backend.default_threshold  # dlib: 0.6 (0.4-0.7 range); Facenet512: 1.04
+FACE_MIN_SIZE = 0.02  # Minimum 2% of image (was 5%, too strict)
 
-        student_id = folder_name.strip()
-        student_display = get_student_name_from_db(student_id)
-
-        if not student_display:
-            parts = folder_name.split('_', 1)
-            student_display = parts[1].replace('_', ' ') if len(parts) == 2 else folder_name
-
-        for img_file in os.listdir(folder_path):
-            if not img_file.lower().endswith(('.jpg', '.jpeg', '.png')):
-                continue
-            img_path = os.path.join(folder_path, img_file)
-            try:
-                img = face_recognition.load_image_file(img_path)
-                encodings = face_recognition.face_encodings(img)
-                if encodings:
-                    _face_db.append({
-                        'student_id': student_id,
-                        'name': student_display,
-                        'encoding': encodings[0]
-                    })
-            except Exception as e:
-                print(f"⚠️ Could not encode {img_path}: {e}")
-
-    print(f"✅ Face DB loaded — {len(_face_db)} encoding(s)")
-
-
-def identify_student(opencv_image, threshold=None) -> dict:
+# Skip HOG + encoding on frames with plausibly nobody in them (one gate per endpoint
+# so /health shows how often each one short-circuits)
+live_face_gate = FacePresenceGate(
+    Config.FACE_GATE_MODE,
+    motion_threshold=Config.FACE_GATE_MOTION_THRESHOLD,
+    hold_frames=Config.FACE_GATE_HOLD_FRAMES
+)
+capture_face_gate = FacePresenceGate(
+    Config.FACE_CAPTURE_GATE_MODE,
+    max_side=640,  # enrollment faces can be small and far away
+    motion_threshold=Config.FACE_GATE_MOTION_THRESHOLD,
+    hold_frames=Config.FACE_GATE_HOLD_FRAMES
+)
+
+capture_localizer = CaptureFaceLocalizer(
+    face_backend.detect,
+    enlarge=2.0,
+    coarse_to_fine=Config.FACE_CAPTURE_COARSE_TO_FINE,
+    coarse_max_side=Config.FACE_CAPTURE_COARSE_MAX_SIDE,
+    roi_padding=Config.FACE_CAPTURE_ROI_PADDING,
+    max_sessions=Config.FACE_CAPTURE_MAX_SESSIONS,
+    session_ttl=Config.FACE_CAPTURE_SESSION_TTL
+)
+
+face_tracker = FaceTracker(
+    min_iou=Config.FACE_TRACK_MIN_IOU,
+    min_similarity=Config.FACE_TRACK_MIN_SIMILARITY,
+    reverify_every=Config.FACE_TRACK_REVERIFY_EVERY,
+    max_sessions=Config.FACE_TRACK_MAX_SESSIONS,
+    session_ttl=Config.FACE_TRACK_SESSION_TTL
+)
+
+# The live embedding backend is cheap to construct; only its first pass is slow
+model_registry.register('live_faces', lambda: face_backend, warm_up=lambda backend: backend.warm_up(), priority=10)
+
+
+def identify_student(frame, threshold=None, schedule_id=None, session_key=None) -> dict:
     """
     🆕 IMPROVED: Adjustable threshold for face recognition
     Lower threshold = more lenient matching
+
+    `frame` is a decode_frame() Frame: detection runs on its small RGB view
+    and full-resolution RGB is only built once a face is found.
+
+    With a schedule_id, faces are matched against that class's roster first
+    and only fall back to the whole gallery when nobody there is close enough.
+    With a session_key (camera), stable already-identified faces reuse their
+    identity from earlier frames instead of being re-encoded.
     """
-    if not _face_db:
+    gallery = face_db.gallery  # one immutable snapshot for the whole request
+    if not gallery:
         return {}
 
+    candidates = gallery
+    if schedule_id is not None:
+        try:
+            candidates = roster_cache.gallery_for(schedule_id, gallery)
+        except Exception as e:
+            print(f"⚠️ Roster lookup failed for schedule {schedule_id}: {e}")
+
     # Use global threshold if not specified
     if threshold is None:
         threshold = FACE_RECOGNITION_THRESHOLD
 
-    rgb = cv2.cvtColor(opencv_image, cv2.COLOR_BGR2RGB)
+    # Max 320px for face detection — much faster for live feed
+    rgb_small = frame.rgb_small
+    face_scale = frame.face_scale
 
-    # Shrink to max 320px for face detection — much faster for live feed
-    h_orig, w_orig = rgb.shape[:2]
-    face_scale = min(1.0, 320 / max(h_orig, w_orig))
-    rgb_small = cv2.resize(rgb, (int(w_orig * face_scale), int(h_orig * face_scale))) if face_scale < 1.0 else rgb
+    if not live_face_gate.allow(rgb_small, key=session_key):
+        return {}
 
     # upsample=1 is fast enough for live detection; use 2 only for static photo capture
-    face_locations_small = face_recognition.face_locations(
-        rgb_small,
-        number_of_times_to_upsample=1,
-        model='hog'
-    )
+    face_locations_small = face_backend.detect(rgb_small, upsample=1)
+    live_face_gate.report(bool(face_locations_small), key=session_key)
 
     # Scale face locations back to original image coordinates
     face_locations = [
@@ -134,7 +213,7 @@ def identify_student(opencv_image, threshold=None) -> dict:
         return {}
 
     # Filter out very small faces (likely background)
-    h, w = opencv_image.shape[:2]
+    h, w = frame.shape[:2]
     valid_faces = []
     for face_loc in face_locations:
         top, right, bottom, left = face_loc
@@ -151,26 +230,30 @@ def identify_student(opencv_image, threshold=None) -> dict:
         print("👤 No valid-sized faces found")
         return {}
 
-    face_encodings = face_recognition.face_encodings(rgb, valid_faces)
-    known_encodings = [e['encoding'] for e in _face_db]
+    rgb = frame.rgb
+
+    def recognize(indices):
+        face_encodings = face_backend.embed(rgb, [valid_faces[i] for i in indices])
+        # One (faces x gallery) distance matrix per gallery — roster first, whole school as fallback
+        return match_with_fallback(candidates, gallery, face_encodings, threshold)
+
+    if session_key is not None and Config.FACE_TRACK_ENABLED:
+        matches = face_tracker.resolve(session_key, valid_faces, rgb, recognize, threshold, context=candidates)
+    else:
+        matches = recognize(list(range(len(valid_faces))))
 
     best_match = {}
-    best_distance = 1.0
+    best_distance = float('inf')
 
-    for i, encoding in enumerate(face_encodings):
-        distances = face_recognition.face_distance(known_encodings, encoding)
-        if len(distances) == 0:
+    for i, match in enumerate(matches):
+        if match is None:
             continue
-        
-        min_idx = int(np.argmin(distances))
-        min_dist = distances[min_idx]
-
+        matched_id, matched_name, min_dist = match
         print(f"👤 Face match distance: {min_dist:.3f} (threshold: {threshold:.3f})")
 
         # 🆕 Use adjustable threshold
         if min_dist < threshold and min_dist < best_distance:
             best_distance = min_dist
-            matched = _face_db[min_idx]
             top, right, bottom, left = valid_faces[i]
 
             # Tighten bbox to actual face — trim hair/forehead from top,
@@ -183,12 +266,12 @@ def identify_student(opencv_image, threshold=None) -> dict:
             tight_right = int(right  - face_w * 0.08)
 
             best_match = {
-                'student_id': matched['student_id'],
-                'name': matched['name'],
+                'student_id': matched_id,
+                'name': matched_name,
                 'face_bbox': [float(tight_left), float(tight_top), float(tight_right), float(tight_bottom)],
-                'confidence': float(1.0 - min_dist)
+                'confidence': float(max(0.0, 1.0 - min_dist))
             }
-            print(f"✅ Matched: {matched['name']} (confidence: {(1.0-min_dist)*100:.1f}%)")
+            print(f"✅ Matched: {matched_name} (confidence: {max(0.0, 1.0-min_dist)*100:.1f}%)")
 
     if not best_match:
         print(f"❌ No match found (best distance: {best_distance:.3f})")
@@ -224,55 +307,54 @@ def detect():
         data = request.get_json()
         image_data = data.get('image')
         face_threshold = data.get('face_threshold', FACE_RECOGNITION_THRESHOLD)  # 🆕 Adjustable
+        schedule_id = data.get('schedule_id')  # Optional: match this class's roster first
+        camera_id = data.get('camera_id') or request.remote_addr  # Face tracks are kept per camera
+        debug = Config.DETECT_DEBUG_TIMINGS or bool(data.get('debug'))  # Add per-stage timings
         
         if not image_data:
             return jsonify({'success': False, 'error': 'No image data provided'}), 400
 
-        image = base64_to_image(image_data)
-        image = cv2.flip(image, 1)
-
-        # Resize for faster processing
-        height, width = image.shape[:2]
-        max_dimension = 640
-        if max(height, width) > max_dimension:
-            scale = max_dimension / max(height, width)
-            new_width = int(width * scale)
-            new_height = int(height * scale)
-            image = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
-
-        # 1. YOLO uniform detection
-        results = model(image, conf=0.5, verbose=False)
-        detections = []
-        for result in results:
-            for box in result.boxes:
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-                confidence = float(box.conf[0].cpu().numpy())
-                class_id = int(box.cls[0].cpu().numpy())
-                class_name = result.names[class_id]
-                detections.append({
-                    'class': class_name,
-                    'confidence': confidence,
-                    'bbox': [float(x1), float(y1), float(x2), float(y2)]
-                })
-
-        # Deduplicate
-        seen_classes: dict = {}
-        for det in sorted(detections, key=lambda d: d['confidence'], reverse=True):
-            cls = det['class']
-            if cls not in seen_classes:
-                seen_classes[cls] = det
-        detections = list(seen_classes.values())
+        started = time.perf_counter()
+        # One pass: decode (reduced for oversized frames) → max 640px BGR for YOLO,
+        # mirrored in place → 320px RGB for face detection
+        frame = decode_frame(image_data, max_side=640, face_max_side=320)
+        image = frame.bgr
+        decode_ms = (time.perf_counter() - started) * 1000
+
+        # 0. Static scene: reuse this camera's last full result
+        if Config.SCENE_CACHE_ENABLED:
+            scene_params = (face_threshold, schedule_id)
+            scene_generation = scene_cache.generation  # a gallery change meanwhile discards this result
+            scene_thumb = scene_cache.thumbnail(image)
+            cached = scene_cache.lookup(camera_id, scene_thumb, scene_params)
+            if cached is not None:
+                response = dict(cached, cached=True)
+                if debug:
+                    response['timings_ms'] = {
+                        'decode': round(decode_ms, 2),
+                        'total': round((time.perf_counter() - started) * 1000, 2),
+                    }
+                return jsonify(response)
+
+        # 1. YOLO uniform detection (on the stage pool) and 2. face recognition
+        # with adjustable threshold (on this thread) run concurrently
+        if stage_executor is not None:
+            uniform_future = stage_executor.submit(timed, detect_uniform, image)
+            student_info, face_ms = timed(identify_student, frame, threshold=face_threshold,
+                                          schedule_id=schedule_id, session_key=camera_id)
+            detections, uniform_ms = uniform_future.result()
+        else:
+            detections, uniform_ms = timed(detect_uniform, image)
+            student_info, face_ms = timed(identify_student, frame, threshold=face_threshold,
+                                          schedule_id=schedule_id, session_key=camera_id)
 
         uniform_status = check_uniform_compliance(detections)
-
-        # 2. Face recognition with adjustable threshold
-        student_info = identify_student(image, threshold=face_threshold)
         student_name = student_info.get('name', '')
         student_id   = student_info.get('student_id', '')
         face_bbox    = student_info.get('face_bbox', None)
         face_conf    = student_info.get('confidence', 0)
 
-        return jsonify({
+        response = {
             'success':          True,
             'detections':       detections,
             'uniform_status':   uniform_status,
@@ -281,7 +363,19 @@ def detect():
             'student_id':       student_id,
             'face_bbox':        face_bbox,
             'face_confidence':  face_conf,
-        })
+            'cached':           False,
+        }
+        if Config.SCENE_CACHE_ENABLED:
+            scene_cache.store(camera_id, scene_thumb, dict(response), scene_params, generation=scene_generation)
+        if debug:
+            response['timings_ms'] = {
+                'decode': round(decode_ms, 2),
+                'uniform': round(uniform_ms, 2),
+                'face': round(face_ms, 2),
+                'total': round((time.perf_counter() - started) * 1000, 2),
+                'parallel': stage_executor is not None,
+            }
+        return jsonify(response)
 
     except Exception as e:
         import traceback
@@ -300,6 +394,7 @@ def detect_face():
         image_data = data.get('image')
         confidence_threshold = data.get('confidence', 0.2)
         quality = data.get('quality', 'accurate')
+        session_id = data.get('session_id')  # Optional: capture session, its last face box is searched first
         
         if not image_data:
             return jsonify({'success': False, 'error': 'No image data provided'}), 400
@@ -314,18 +409,13 @@ def detect_face():
         else:
             upsample = 3
         
-        # Resize image larger before detection to help with distant faces
-        scale = 2.0
-        enlarged = cv2.resize(rgb, (int(rgb.shape[1] * scale), int(rgb.shape[0] * scale)))
-        
-        # Detect faces on enlarged image
-        face_locations_enlarged = face_recognition.face_locations(enlarged, number_of_times_to_upsample=upsample, model='hog')
-        
-        # Scale back coordinates to original image size
-        face_locations = [
-            (int(top / scale), int(right / scale), int(bottom / scale), int(left / scale))
-            for (top, right, bottom, left) in face_locations_enlarged
-        ]
+        # Enlarged 2x + upsampled HOG for distant faces; by default only inside
+        # the ROI of a quick coarse hit, whole frame as the fallback
+        if capture_face_gate.allow(rgb, key=session_id):
+            face_locations = capture_localizer.locate(rgb, upsample, session_key=session_id)
+            capture_face_gate.report(bool(face_locations), key=session_id)
+        else:
+            face_locations = None
         
         if not face_locations:
             return jsonify({
@@ -375,7 +465,7 @@ def detect_face():
         center_score = max(0, 1.0 - center_distance * 1.5)  # less strict centering
         
         # Get face encodings for quality check
-        face_encodings = face_recognition.face_encodings(rgb, [largest_face])
+        face_encodings = face_backend.embed(rgb, [largest_face])
         encoding_score = 1.0 if face_encodings else 0.5
         
         confidence_score = (size_score * 0.4 + center_score * 0.3 + encoding_score * 0.3)
@@ -410,10 +500,11 @@ def set_face_threshold():
     global FACE_RECOGNITION_THRESHOLD
     
     data = request.get_json()
-    new_threshold = data.get('threshold', 0.6)
+    new_threshold = data.get('threshold', face_backend.default_threshold)
     
-    # Clamp between 0.3 and 0.8
-    new_threshold = max(0.3, min(0.8, new_threshold))
+    # Clamp to the backend's sensible range (0.3-0.8 for dlib)
+    low, high = face_backend.threshold_range
+    new_threshold = max(low, min(high, new_threshold))
     
     FACE_RECOGNITION_THRESHOLD = new_threshold
     
@@ -432,25 +523,77 @@ def get_face_threshold():
     return jsonify({
         'success': True,
         'threshold': FACE_RECOGNITION_THRESHOLD,
-        'recommended_range': '0.4-0.7',
+        'recommended_range': '0.4-0.7' if face_backend.name == 'dlib' else f'{face_backend.threshold_range[0]}-{face_backend.threshold_range[1]}',
+        'embedding_backend': face_backend.name,
         'description': 'Lower = more lenient, Higher = more strict'
     })
 
 
+def require_admin():
+    """
+    None when the request carries an admin account's credentials (HTTP Basic,
+    checked against the users table), else the error response to return
+    """
+    from barkwear2.utils.staffdb import staff_db  # bcrypt / pymysql only for admin actions
+    auth = request.authorization
+    if not auth or not auth.username or not auth.password:
+        return jsonify({'success': False, 'error': 'Admin login required'}), 401
+    try:
+        user = staff_db.authenticate_user(auth.username, auth.password)
+    except Exception as e:
+        print(f"⚠️ Admin check failed: {e}")
+        return jsonify({'success': False, 'error': 'Could not verify admin login'}), 503
+    if not user or user.get('role') != 'admin':
+        return jsonify({'success': False, 'error': 'Admin login required'}), 403
+    return None
+
+
 @app.route('/reload-faces', methods=['POST'])
 def reload_faces():
-    reload_face_db()
-    return jsonify({'success': True, 'total_encodings': len(_face_db)})
+    """
+    Admin repair action: rebuild the whole face gallery in the background
+
+    Enrollment, updates and deletes already patch the live gallery, so this is
+    only needed after photos were changed on disk by hand.
+    /detect keeps serving the previous gallery until the new one is swapped in.
+    Requests made while a build is running are folded into one follow-up build.
+    """
+    denied = require_admin()
+    if denied:
+        return denied
+
+    status = face_db.request_reload()
+    return jsonify({'success': True, **status}), 202
+
+
+@app.route('/reload-faces/status', methods=['GET'])
+def reload_faces_status():
+    """Build progress and the gallery version currently being served"""
+    return jsonify({'success': True, **face_db.status()})
 
 
 @app.route('/health', methods=['GET'])
 def health():
     return jsonify({
         'status': 'ok',
-        'model_loaded': model is not None,
-        'face_encodings': len(_face_db),
-        'known_students': len(set(e['student_id'] for e in _face_db)),
-        'face_threshold': FACE_RECOGNITION_THRESHOLD
+        'model_loaded': model_registry.is_ready('uniform_detector'),
+        'face_encodings': len(face_db.gallery),
+        'known_students': face_db.gallery.student_count(),
+        'face_db_version': face_db.version,
+        'face_threshold': FACE_RECOGNITION_THRESHOLD,
+        'face_embedding_backend': face_backend.name,
+        'models': model_registry.status(),
+        'face_tracking': dict(face_tracker.stats),
+        'yolo_batching': yolo_batcher.stats() if yolo_batcher is not None else None,
+        'parallel_stages': Config.DETECT_PARALLEL_STAGES,
+        'scene_cache': scene_cache.snapshot() if Config.SCENE_CACHE_ENABLED else None,
+        'capture_localization': dict(capture_localizer.stats),
+        'face_gate': {
+            'mode': live_face_gate.mode,
+            'capture_mode': capture_face_gate.mode,
+            'live': dict(live_face_gate.stats),
+            'capture': dict(capture_face_gate.stats)
+        }
     })
 
 
@@ -458,12 +601,12 @@ def health():
 def test_detection():
     return jsonify({
         'status': 'ok',
-        'model_classes': model.names,
+        'model_classes': uniform_model().names,
         'required_items': REQUIRED_UNIFORM_ITEMS,
-        'confidence_threshold': 0.5,
+        'confidence_threshold': YOLO_CONFIDENCE,
         'face_threshold': FACE_RECOGNITION_THRESHOLD,
-        'face_encodings': len(_face_db),
-        'known_students': [{'id': e['student_id'], 'name': e['name']} for e in _face_db]
+        'face_encodings': len(face_db.gallery),
+        'known_students': [{'id': sid, 'name': name} for sid, name in face_db.gallery.entries()]
     })
 
 
@@ -482,11 +625,18 @@ if __name__ == '__main__':
     except Exception as db_err:
         print(f"⚠️ Database init failed: {db_err}")
 
-    reload_face_db()
+    # Warm models (uniform detector first) while the face gallery loads. Only
+    # here, never at import: tools, tests and spawned encoding workers import
+    # this module too ('lazy' = load on first request)
+    model_registry.warm_up(Config.MODEL_WARMUP)
+
+    face_db.reload()
 
     print(f"🎯 Required uniform items: {REQUIRED_UNIFORM_ITEMS}")
-    print(f"🎯 Model: uniform_detector_v2 (98.3% mAP50!)")
+    print(f"🎯 Model: uniform_detector_v2 (98.3% mAP50!) — {Config.UNIFORM_MODEL_FORMAT}: {MODEL_PATH}")
+    print(f"⏳ Model warm-up: {Config.MODEL_WARMUP} (readiness in GET /health)")
     print(f"📊 Uniform confidence: 0.5 (50%)")
+    print(f"👤 Face embedding backend: {face_backend.name} ({face_backend.dim}-d)")
     print(f"👤 Face recognition threshold: {FACE_RECOGNITION_THRESHOLD} (adjustable)")
     print(f"   - Lower threshold = more lenient matching")
     print(f"   - Can adjust via: POST /set-face-threshold")
@@ -0,0 +1,118 @@
+"""
+Detection / embedding latency, throughput and memory of each face embedding backend
+
+Every backend runs in its own fresh process on the same enrollment photos, so
+model load time and peak memory are not polluted by the other backend.
+Per-photo timings are medians; batch throughput uses embed_batch().
+
+Run from the repo root:
+    python -m barkwear2.benchmarks.bench_embedding_backends
+    python -m barkwear2.benchmarks.bench_embedding_backends --backends dlib --limit 20
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+from barkwear2.config import Config
+from barkwear2.services.embedding_backends import BACKENDS, get_embedding_backend
+
+
+def list_photos(photo_root, limit):
+    photos = []
+    for dirpath, _, filenames in sorted(os.walk(photo_root)):
+        for filename in sorted(filenames):
+            if filename.lower().endswith(('.jpg', '.jpeg', '.png')):
+                photos.append(os.path.join(dirpath, filename))
+    return photos[:limit]
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process, or None where it can't be read"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024  # bytes on macOS, KB elsewhere
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, 'peak_wset', info.rss) / 1024 / 1024
+    except ImportError:
+        return None
+
+
+def run_backend(name, photos, batch_size):
+    """Runs in a spawned worker; returns a dict of measurements"""
+    started = time.perf_counter()
+    backend = get_embedding_backend(name)
+    backend.warm_up()
+    load_s = time.perf_counter() - started
+
+    images = [backend.load_image(path) for path in photos]
+    detect_ms, embed_ms, faces = [], [], 0
+    for image in images:
+        start = time.perf_counter()
+        boxes = backend.detect(image)
+        detect_ms.append((time.perf_counter() - start) * 1000)
+        if not boxes:
+            continue
+        start = time.perf_counter()
+        backend.embed(image, boxes[:1])
+        embed_ms.append((time.perf_counter() - start) * 1000)
+        faces += 1
+
+    start = time.perf_counter()
+    for i in range(0, len(images), batch_size):
+        backend.embed_batch(images[i:i + batch_size])
+    batch_s = time.perf_counter() - start
+
+    return {
+        'backend': name,
+        'dim': backend.dim,
+        'load_s': load_s,
+        'photos': len(images),
+        'faces': faces,
+        'detect_ms': statistics.median(detect_ms) if detect_ms else float('nan'),
+        'embed_ms': statistics.median(embed_ms) if embed_ms else float('nan'),
+        'batch_photos_per_s': len(images) / batch_s if batch_s > 0 else float('nan'),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--photos', default=Config.STUDENT_PHOTO_FOLDER, help='Folder of enrollment photos')
+    parser.add_argument('--limit', type=int, default=50, help='Max photos to use')
+    parser.add_argument('--backends', nargs='+', default=sorted(BACKENDS), choices=sorted(BACKENDS))
+    parser.add_argument('--batch-size', type=int, default=8)
+    args = parser.parse_args()
+
+    photos = list_photos(args.photos, args.limit)
+    if not photos:
+        print(f"❌ No photos found in {args.photos}")
+        return
+
+    print(f"{len(photos)} photo(s) from {args.photos}\n")
+    print(f"{'backend':>9} | {'dim':>4} | {'load s':>6} | {'faces':>5} | {'detect ms':>9} | "
+          f"{'embed ms':>8} | {'batch img/s':>11} | {'peak MB':>7}")
+    print('-' * 84)
+
+    context = multiprocessing.get_context('spawn')
+    for name in args.backends:
+        with context.Pool(1) as pool:
+            try:
+                r = pool.apply(run_backend, (name, photos, args.batch_size))
+            except Exception as e:
+                print(f"{name:>9} | ❌ {e}")
+                continue
+        peak = f"{r['peak_rss_mb']:.0f}" if r['peak_rss_mb'] is not None else 'n/a'
+        print(f"{r['backend']:>9} | {r['dim']:>4} | {r['load_s']:>6.2f} | {r['faces']:>5} | "
+              f"{r['detect_ms']:>9.1f} | {r['embed_ms']:>8.1f} | {r['batch_photos_per_s']:>11.1f} | {peak:>7}")
+
+
+if __name__ == '__main__':
+    main()
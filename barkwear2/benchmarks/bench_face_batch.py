@@ -0,0 +1,57 @@
+"""
+Throughput of FaceRecognitionService batch recognition at batch sizes 1 / 8 / 32
+
+Recognizes the same enrollment photos through recognize_faces() in chunks of
+each batch size (batch size 1 is the old one-call-per-image path) and reports
+images per second. Only reads the embedding store, never writes it.
+
+Run from the repo root:
+    python -m barkwear2.benchmarks.bench_face_batch
+"""
+import argparse
+import time
+
+import cv2
+
+from barkwear2.benchmarks.bench_embedding_backends import list_photos
+from barkwear2.config import Config
+from barkwear2.services.face_service import FaceRecognitionService
+
+
+def throughput(service, images, batch_size):
+    start = time.perf_counter()
+    for i in range(0, len(images), batch_size):
+        service.recognize_faces(images[i:i + batch_size])
+    return len(images) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--photos', default=Config.STUDENT_PHOTO_FOLDER, help='Folder of enrollment photos')
+    parser.add_argument('--count', type=int, default=64, help='Images per run (photos are repeated to fill it)')
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8, 32])
+    args = parser.parse_args()
+
+    photos = list_photos(args.photos, args.count)
+    if not photos:
+        print(f"❌ No photos found in {args.photos}")
+        return
+    images = [cv2.imread(path) for path in photos]
+    images = [img for img in images if img is not None]
+    images = (images * (args.count // len(images) + 1))[:args.count]
+
+    service = FaceRecognitionService()
+    service.warm_up()  # keep model build time out of the numbers
+
+    print(f"{len(images)} image(s), {len(service.known_faces)} enrolled face(s)\n")
+    print(f"{'batch':>5} | {'img/s':>8} | {'speedup':>7}")
+    print('-' * 27)
+    baseline = None
+    for batch_size in args.batch_sizes:
+        rate = throughput(service, images, batch_size)
+        baseline = baseline or rate
+        print(f"{batch_size:>5} | {rate:>8.1f} | {rate / baseline:>6.2f}x")
+
+
+if __name__ == '__main__':
+    main()
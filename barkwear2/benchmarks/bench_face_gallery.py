@@ -0,0 +1,69 @@
+"""
+Per-frame face matching latency: list + face_distance loop vs FaceGallery matrix
+
+Run from the repo root:
+    python -m barkwear2.benchmarks.bench_face_gallery
+"""
+import argparse
+import time
+
+import numpy as np
+
+from barkwear2.services.face_gallery import FaceGallery, ENCODING_DIM
+
+
+def random_encodings(n, rng):
+    """Encodings with roughly the scale of dlib's 128-d output"""
+    enc = rng.normal(0, 0.09, size=(n, ENCODING_DIM))
+    return enc.astype(np.float64)
+
+
+def legacy_match(face_db, face_encodings):
+    """What identify_student() used to do on every /detect call"""
+    known_encodings = [e['encoding'] for e in face_db]
+    results = []
+    for encoding in face_encodings:
+        # face_recognition.face_distance == np.linalg.norm(known - enc, axis=1)
+        distances = np.linalg.norm(np.array(known_encodings) - encoding, axis=1)
+        min_idx = int(np.argmin(distances))
+        results.append((min_idx, distances[min_idx]))
+    return results
+
+
+def time_call(fn, repeats):
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 5000, 50000])
+    parser.add_argument('--faces', type=int, default=2, help='Faces per frame')
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    queries = random_encodings(args.faces, rng)
+
+    print(f"{'gallery':>8} | {'legacy ms':>10} | {'matrix ms':>10} | {'speedup':>7}")
+    print('-' * 45)
+    for size in args.sizes:
+        encodings = random_encodings(size, rng)
+        face_db = [{'student_id': str(i), 'name': str(i), 'encoding': e} for i, e in enumerate(encodings)]
+        gallery = FaceGallery.from_entries(face_db)
+
+        legacy_ms = time_call(lambda: legacy_match(face_db, queries), args.repeats)
+        matrix_ms = time_call(lambda: gallery.best_matches(queries), args.repeats)
+
+        legacy_idx = [i for i, _ in legacy_match(face_db, queries)]
+        matrix_idx = list(gallery.best_matches(queries)[0])
+        assert legacy_idx == matrix_idx, "matrix path picked a different match"
+
+        print(f"{size:>8} | {legacy_ms:>10.3f} | {matrix_ms:>10.3f} | {legacy_ms / matrix_ms:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""
+Recall and latency of the IVF face index against exact brute-force search
+
+Uses synthetic 512-d "identities" (a random centre per student plus noise per
+capture) so the data is clustered the way real Facenet512 embeddings are. Each query
+has exactly one true match, so recall@1 is the number that matters for
+identification; recall@k also counts unrelated far neighbours.
+
+Run from the repo root:
+    python -m barkwear2.benchmarks.bench_face_index
+"""
+import argparse
+import time
+
+import numpy as np
+
+from barkwear2.services.face_index import BruteForceIndex, IVFIndex
+
+
+def make_gallery(n, dim, rng, noise=0.35):
+    centres = rng.normal(size=(n, dim)).astype(np.float32)
+    gallery = centres + noise * rng.normal(size=(n, dim)).astype(np.float32)
+    return centres, gallery
+
+
+def make_queries(centres, count, rng, noise=0.35):
+    ids = rng.choice(len(centres), count, replace=False)
+    queries = centres[ids] + noise * rng.normal(size=(count, centres.shape[1])).astype(np.float32)
+    return ids, queries
+
+
+def run_queries(index, queries, k, **search_kwargs):
+    results = []
+    start = time.perf_counter()
+    for query in queries:
+        results.append([key for key, _ in index.search(query, k=k, **search_kwargs)])
+    elapsed_ms = (time.perf_counter() - start) / len(queries) * 1000
+    return results, elapsed_ms
+
+
+def recall(approx, exact):
+    hits = sum(len(set(a) & set(e)) for a, e in zip(approx, exact))
+    return hits / sum(len(e) for e in exact)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size', type=int, default=20000, help='Gallery size')
+    parser.add_argument('--dim', type=int, default=512)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--nlist', type=int, default=256)
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    centres, gallery = make_gallery(args.size, args.dim, rng)
+    _, queries = make_queries(centres, args.queries, rng)
+
+    exact = BruteForceIndex(args.dim, metric='cosine')
+    ivf = IVFIndex(args.dim, metric='cosine', nlist=args.nlist, min_train_size=args.size + 1)
+    start = time.perf_counter()
+    for i, vector in enumerate(gallery):
+        exact.add(str(i), vector)
+        ivf.add(str(i), vector)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ivf.train()
+    train_s = time.perf_counter() - start
+    print(f"Gallery {args.size} x {args.dim}-d | insert {build_s:.2f}s (both) | IVF train {train_s:.2f}s")
+
+    exact_top1, _ = run_queries(exact, queries, 1)
+    exact_topk, exact_ms = run_queries(exact, queries, args.k)
+
+    print(f"\n{'backend':>14} | {'ms/query':>8} | {'recall@1':>8} | {'recall@' + str(args.k):>9}")
+    print('-' * 50)
+    print(f"{'exact':>14} | {exact_ms:>8.3f} | {1.0:>8.3f} | {1.0:>9.3f}")
+    for nprobe in args.nprobe:
+        top1, _ = run_queries(ivf, queries, 1, nprobe=nprobe)
+        topk, ivf_ms = run_queries(ivf, queries, args.k, nprobe=nprobe)
+        label = f"ivf nprobe={nprobe}"
+        print(f"{label:>14} | {ivf_ms:>8.3f} | {recall(top1, exact_top1):>8.3f} | {recall(topk, exact_topk):>9.3f}")
+
+    # Incremental delete/insert keeps working after training
+    removed = [str(i) for i in range(0, args.size, 10)]
+    for key in removed:
+        ivf.remove(key)
+        exact.remove(key)
+    assert all(key not in ivf for key in removed) and len(ivf) == len(exact)
+    print(f"\nRemoved {len(removed)} entries — IVF and exact sizes agree ({len(ivf)})")
+
+
+if __name__ == '__main__':
+    main()
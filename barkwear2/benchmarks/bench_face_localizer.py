@@ -0,0 +1,149 @@
+"""
+Box agreement and latency of /detect-face localization: full frame vs coarse-to-fine
+
+For every enrollment photo, the old full-frame search (frame enlarged 2x, HOG
+with the capture upsample) and CaptureFaceLocalizer.locate() (coarse pass,
+then the same search inside a padded ROI) run on the same frame. Reports the
+largest box-corner difference in pixels and the median time of each.
+
+Then checks the session path: a face located on the left of a wide frame is
+moved to the right, outside the session's stored ROI, and locate() must still
+find it (falling back to the coarse/full search) at the full-frame box.
+
+Finally measures the recall of the Haar presence gate that
+Config.FACE_CAPTURE_GATE_MODE = 'haar' would put before the search: of the
+frames where the full search finds a face, the share the gate lets through,
+at full size and shrunk to stand in for a student further from the camera.
+
+Exits with status 1 if any corner differs by more than --tol pixels or a face
+is missed.
+
+Run from the repo root:
+    python -m barkwear2.benchmarks.bench_face_localizer
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from barkwear2.benchmarks.bench_embedding_backends import list_photos
+from barkwear2.config import Config
+from barkwear2.services.embedding_backends import get_embedding_backend
+from barkwear2.services.face_gate import FacePresenceGate
+from barkwear2.services.face_localizer import CaptureFaceLocalizer, box_area
+
+
+def corner_error(boxes, reference):
+    """Largest corner difference between each reference box and its closest box, None if one is missing"""
+    if len(boxes) < len(reference):
+        return None
+    worst = 0
+    for ref in reference:
+        worst = max(worst, min(max(abs(a - b) for a, b in zip(box, ref)) for box in boxes))
+    return worst
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def make_localizer(backend, coarse_to_fine=True):
+    return CaptureFaceLocalizer(
+        backend.detect,
+        enlarge=2.0,
+        coarse_to_fine=coarse_to_fine,
+        coarse_max_side=Config.FACE_CAPTURE_COARSE_MAX_SIDE,
+        roi_padding=Config.FACE_CAPTURE_ROI_PADDING
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--photos', default=Config.STUDENT_PHOTO_FOLDER, help='Folder of enrollment photos')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--upsample', type=int, default=2, help="2 = /detect-face 'fast', 3 = 'accurate'")
+    parser.add_argument('--tol', type=int, default=4, help='Max box-corner difference in pixels')
+    parser.add_argument('--gate-scales', type=float, nargs='+', default=[1.0, 0.5, 0.33],
+                        help='Frame scales for the gate recall (smaller = more distant face)')
+    args = parser.parse_args()
+
+    backend = get_embedding_backend('dlib')
+    images = [img for img in (backend.load_image(p) for p in list_photos(args.photos, args.limit))
+              if img is not None]
+    if not images:
+        print(f"❌ No photos found in {args.photos}")
+        sys.exit(1)
+
+    localizer = make_localizer(backend)
+    full_ms, new_ms, errors, failed, compared = [], [], [], False, 0
+    for i, rgb in enumerate(images):
+        reference, ms = timed(localizer.detect_full, rgb, args.upsample)
+        full_ms.append(ms)
+        boxes, ms = timed(localizer.locate, rgb, args.upsample)
+        new_ms.append(ms)
+        if not reference:
+            continue
+        compared += 1
+        error = corner_error(boxes, reference)
+        if error is None or error > args.tol:
+            print(f"❌ photo {i}: full frame {reference}, coarse-to-fine {boxes}")
+            failed = True
+        if error is not None:
+            errors.append(error)
+
+    print(f"📊 {compared} photo(s) with a face, upsample={args.upsample}")
+    print(f"   max corner difference: {max(errors) if errors else 0} px (tolerance {args.tol})")
+    print(f"   median ms: full frame {statistics.median(full_ms):.1f}, "
+          f"coarse-to-fine {statistics.median(new_ms):.1f}")
+    print(f"   stages: {localizer.stats}")
+
+    # A face that moved out of the session ROI must still be found
+    moved_checked = 0
+    for i, rgb in enumerate(images):
+        height, width = rgb.shape[:2]
+        left_frame = np.zeros((height, width * 2, 3), dtype=rgb.dtype)
+        right_frame = np.zeros_like(left_frame)
+        left_frame[:, :width] = rgb
+        right_frame[:, width:] = rgb
+
+        session = make_localizer(backend)
+        if not session.locate(left_frame, args.upsample, session_key='capture'):
+            continue
+        reference = session.detect_full(right_frame, args.upsample)
+        if not reference:
+            continue
+        boxes = session.locate(right_frame, args.upsample, session_key='capture')
+        error = corner_error(boxes, reference)
+        moved_checked += 1
+        if error is None or error > args.tol or max(boxes, key=box_area)[3] < width:
+            print(f"❌ photo {i}: moved face not found outside the session ROI (got {boxes}, want {reference})")
+            failed = True
+        elif session.stats['session_roi']:
+            print(f"❌ photo {i}: a session ROI without the face reported a hit")
+            failed = True
+
+    print(f"   moved-face check: {moved_checked} photo(s) {'❌' if failed else '✅'}")
+
+    # What a capture gate would drop; no source key, so no frame is passed on hold
+    gate = FacePresenceGate('haar', max_side=640)  # as /detect-face builds it
+    print("   haar gate recall:")
+    for scale in args.gate_scales:
+        passed, with_face = 0, 0
+        for rgb in images:
+            frame = cv2.resize(rgb, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA) if scale != 1.0 else rgb
+            if not localizer.detect_full(frame, args.upsample):
+                continue
+            with_face += 1
+            passed += gate.allow(frame)
+        recall = passed / with_face if with_face else 0.0
+        print(f"     scale {scale:.2f}: {passed}/{with_face} frame(s) with a face passed ({recall:.0%})")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
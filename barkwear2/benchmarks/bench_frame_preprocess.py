@@ -0,0 +1,114 @@
+"""
+Per-frame cost of /detect preprocessing: old multi-pass path vs decode_frame()
+
+Old: PIL decode → np.array → RGB→BGR → flip → resize to 640 (YOLO input), then
+BGR→RGB → resize to 320 in identify_student. New: one decode straight to BGR
+(reduced-scale for oversized frames), in-place flip, 320px RGB from the same
+buffer. Frames are synthetic webcam-like JPEGs at a few resolutions, or
+the --images files re-encoded as JPEG.
+
+Run from the repo root:
+    python -m barkwear2.benchmarks.bench_frame_preprocess
+"""
+import argparse
+import base64
+import statistics
+import time
+from io import BytesIO
+
+import cv2
+import numpy as np
+
+from barkwear2.services.frame_preprocess import decode_frame
+
+RESOLUTIONS = [(480, 640), (720, 1280), (1080, 1920)]
+
+
+def synthetic_frame(height, width, seed=0):
+    """Smooth noise plus a few shapes, so the JPEG has realistic entropy"""
+    rng = np.random.default_rng(seed)
+    image = cv2.resize(rng.integers(0, 255, (height // 16, width // 16, 3), dtype=np.uint8), (width, height))
+    for _ in range(12):
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.circle(image, (x, y), int(rng.integers(10, height // 4)), color, -1)
+    return image
+
+
+def to_base64_jpeg(image, quality=90):
+    ok, buf = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return 'data:image/jpeg;base64,' + base64.b64encode(buf.tobytes()).decode()
+
+
+def old_preprocess(base64_string, decode):
+    """The /detect + identify_student steps before decode_frame()"""
+    image = decode(base64_string)
+    image = cv2.flip(image, 1)
+    height, width = image.shape[:2]
+    if max(height, width) > 640:
+        scale = 640 / max(height, width)
+        image = cv2.resize(image, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_LINEAR)
+    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    h_orig, w_orig = rgb.shape[:2]
+    face_scale = min(1.0, 320 / max(h_orig, w_orig))
+    rgb_small = cv2.resize(rgb, (int(w_orig * face_scale), int(h_orig * face_scale))) if face_scale < 1.0 else rgb
+    return image, rgb_small, rgb
+
+
+def old_decoder():
+    """PIL decode as in base64_to_image (cv2 full-size decode when PIL is not installed)"""
+    try:
+        from PIL import Image
+    except ImportError:
+        print("⚠️ PIL not installed — old path uses a full-size cv2.imdecode instead\n")
+
+        def decode(base64_string):
+            data = base64.b64decode(base64_string.split(',')[1])
+            return cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        return decode
+
+    def decode(base64_string):
+        pil_image = Image.open(BytesIO(base64.b64decode(base64_string.split(',')[1])))
+        return cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+    return decode
+
+
+def per_frame_ms(fn, frame, repeats):
+    fn(frame)
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(frame)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--images', nargs='+', default=None, help='Image files to use instead of synthetic frames')
+    parser.add_argument('--repeats', type=int, default=50)
+    args = parser.parse_args()
+
+    if args.images:
+        images = [img for img in (cv2.imread(p) for p in args.images) if img is not None]
+        if not images:
+            print("❌ None of the --images could be read")
+            return
+    else:
+        images = [synthetic_frame(h, w) for h, w in RESOLUTIONS]
+
+    decode = old_decoder()
+    print(f"{'frame':>11} | {'old ms':>7} | {'new ms':>7} | {'new+rgb':>7} | {'saved':>6}")
+    print('-' * 52)
+    for image in images:
+        frame = to_base64_jpeg(image)
+        old = per_frame_ms(lambda f: old_preprocess(f, decode), frame, args.repeats)
+        new = per_frame_ms(decode_frame, frame, args.repeats)
+        # Frames with a face also need full-resolution RGB for the embedding
+        new_rgb = per_frame_ms(lambda f: decode_frame(f).rgb, frame, args.repeats)
+        height, width = image.shape[:2]
+        print(f"{width:>5}x{height:<5} | {old:>7.2f} | {new:>7.2f} | {new_rgb:>7.2f} | {1 - new / old:>5.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Memory, latency and top-1 agreement of int8 embedding storage vs float32
+
+Two synthetic workloads shaped like the real ones: the live dlib gallery
+(FaceGallery, 128-d, Euclidean) and the Facenet512 index behind
+FaceRecognitionService (BruteForceIndex, 512-d, cosine), the latter with and
+without a float32 re-rank of the top candidates. "top-1" is the share of
+queries whose nearest match is the same as with float32 storage.
+
+Run from the repo root:
+    python -m barkwear2.benchmarks.bench_quantization
+"""
+import argparse
+import time
+
+import numpy as np
+
+from barkwear2.services.face_gallery import FaceGallery
+from barkwear2.services.face_index import BruteForceIndex
+
+
+def identities(n, dim, rng, spread, noise):
+    centres = rng.normal(0, spread, size=(n, dim)).astype(np.float32)
+    gallery = centres + rng.normal(0, noise, size=(n, dim)).astype(np.float32)
+    queries = centres + rng.normal(0, noise, size=(n, dim)).astype(np.float32)
+    return gallery, queries
+
+
+def timed(fn, repeats):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return result, (time.perf_counter() - start) / repeats * 1000
+
+
+def bench_gallery(size, queries, repeats, rng):
+    encodings, probes = identities(size, 128, rng, spread=0.09, noise=0.02)
+    probes = probes[rng.choice(size, queries, replace=False)]
+    ids = [str(i) for i in range(size)]
+    base = FaceGallery(encodings, ids, ids)
+    (reference, _), base_ms = timed(lambda: base.best_matches(probes), repeats)
+
+    print(f"\nFaceGallery: {size} x 128-d, {queries} queries per frame")
+    print(f"{'dtype':>8} | {'KB':>8} | {'match ms':>8} | {'top-1':>6}")
+    print('-' * 40)
+    print(f"{'float32':>8} | {base.nbytes / 1024:>8.0f} | {base_ms:>8.3f} | {1.0:>6.3f}")
+    for dtype in ('int8',):
+        gallery = base.quantized(dtype)
+        (idx, _), ms = timed(lambda: gallery.best_matches(probes), repeats)
+        print(f"{dtype:>8} | {gallery.nbytes / 1024:>8.0f} | {ms:>8.3f} | {np.mean(idx == reference):>6.3f}")
+
+
+def bench_index(size, queries, rerank, rng):
+    vectors, probes = identities(size, 512, rng, spread=1.0, noise=0.35)
+    probes = probes[rng.choice(size, queries, replace=False)]
+
+    def build(dtype, rerank_k):
+        index = BruteForceIndex(512, 'cosine', dtype=dtype, rerank=rerank_k, exact_lookup=lambda key: vectors[key])
+        for key, vector in enumerate(vectors):
+            index.add(key, vector)
+        return index
+
+    def run(index):
+        start = time.perf_counter()
+        top = [index.search(probe, k=1)[0][0] for probe in probes]
+        return np.asarray(top), (time.perf_counter() - start) / len(probes) * 1000
+
+    reference, base_ms = run(build('float32', 0))
+    print(f"\nBruteForceIndex: {size} x 512-d cosine, re-rank top {rerank}")
+    print(f"{'dtype':>16} | {'KB':>8} | {'query ms':>8} | {'top-1':>6}")
+    print('-' * 48)
+    print(f"{'float32':>16} | {size * 512 * 4 / 1024:>8.0f} | {base_ms:>8.3f} | {1.0:>6.3f}")
+    for dtype in ('int8',):
+        for rerank_k in (0, rerank):
+            index = build(dtype, rerank_k)
+            top, ms = run(index)
+            label = f"{dtype} + rerank" if rerank_k else dtype
+            print(f"{label:>16} | {index.nbytes / 1024:>8.0f} | {ms:>8.3f} | {np.mean(top == reference):>6.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--gallery-size', type=int, default=50000, help='Rows in the dlib gallery')
+    parser.add_argument('--index-size', type=int, default=20000, help='Students in the Facenet512 index')
+    parser.add_argument('--queries', type=int, default=4, help='Faces per frame (gallery) / queries (index x 50)')
+    parser.add_argument('--rerank', type=int, default=16)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    bench_gallery(args.gallery_size, args.queries, args.repeats, rng)
+    bench_index(args.index_size, args.queries * 50, args.rerank, rng)
+
+
+if __name__ == '__main__':
+    main()
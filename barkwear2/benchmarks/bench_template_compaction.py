@@ -0,0 +1,90 @@
+"""
+Memory, latency and accuracy of per-student template compaction
+
+Measured on the enrollment photos themselves (leave-one-out): every photo is
+matched against a gallery built from all the *other* photos, once with every
+template kept and once compacted. Reads encodings from the reload cache, so
+run the backend (or reload_face_db) once first.
+
+Run from the repo root:
+    python -m barkwear2.benchmarks.bench_template_compaction
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from barkwear2.config import Config
+from barkwear2.services.encoding_cache import EncodingCache
+from barkwear2.services.face_gallery import FaceGallery
+
+
+def load_enrollment_encodings(cache_path):
+    entries = EncodingCache(cache_path).load().entries
+    encodings, student_ids = [], []
+    for photo_path, entry in sorted(entries.items()):
+        if entry['encoding'] is None:
+            continue
+        encodings.append(entry['encoding'])
+        student_ids.append(os.path.basename(os.path.dirname(photo_path)).strip())
+    return encodings, student_ids
+
+
+def leave_one_out(encodings, student_ids, threshold, diversity=None):
+    """Top-1 accuracy when each photo is matched against all the others"""
+    correct = 0
+    for i in range(len(encodings)):
+        rest = [j for j in range(len(encodings)) if j != i]
+        gallery = FaceGallery([encodings[j] for j in rest], [student_ids[j] for j in rest],
+                              [student_ids[j] for j in rest])
+        if diversity is not None:
+            gallery = gallery.compacted(diversity)
+        sid, _, dist = gallery.match([encodings[i]])[0]
+        correct += sid == student_ids[i] and dist < threshold
+    return correct / len(encodings)
+
+
+def match_latency_ms(gallery, queries, repeats):
+    gallery.best_matches(queries)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        gallery.best_matches(queries)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--cache', default=Config.FACE_ENCODING_CACHE_PATH)
+    parser.add_argument('--diversity', type=float, nargs='+', default=[Config.FACE_TEMPLATE_DIVERSITY])
+    parser.add_argument('--threshold', type=float, default=0.6)
+    parser.add_argument('--repeats', type=int, default=200)
+    args = parser.parse_args()
+
+    encodings, student_ids = load_enrollment_encodings(args.cache)
+    if len(set(student_ids)) < 2:
+        print(f"❌ Need encodings for at least 2 students in {args.cache} — reload the face DB first")
+        return
+
+    full = FaceGallery(encodings, student_ids, student_ids)
+    queries = np.asarray(encodings[:4])
+    full_ms = match_latency_ms(full, queries, args.repeats)
+    full_acc = leave_one_out(encodings, student_ids, args.threshold)
+
+    print(f"{len(encodings)} enrollment encodings, {len(set(student_ids))} students\n")
+    print(f"{'gallery':>16} | {'rows':>6} | {'KB':>7} | {'match ms':>8} | {'LOO acc':>7}")
+    print('-' * 58)
+    print(f"{'full':>16} | {len(full):>6} | {full.nbytes / 1024:>7.1f} | {full_ms:>8.3f} | {full_acc:>7.3f}")
+    for diversity in args.diversity:
+        compacted = full.compacted(diversity)
+        ms = match_latency_ms(compacted, queries, args.repeats)
+        acc = leave_one_out(encodings, student_ids, args.threshold, diversity)
+        label = f"compact d={diversity}"
+        print(f"{label:>16} | {len(compacted):>6} | {compacted.nbytes / 1024:>7.1f} | "
+              f"{ms:>8.3f} | {acc:>7.3f}")
+        print(f"{'':>16}   saved {100 * (1 - len(compacted) / len(full)):.0f}% memory, "
+              f"{full_ms - ms:+.3f} ms/frame, accuracy {acc - full_acc:+.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Parity check: DeepFaceBackend embeddings vs DeepFace.represent
+
+Vectors already in the embedding store came from DeepFace.represent, so the
+batched backend has to reproduce them. For every photo this compares
+  - embed_batch() (extract_faces + one batched forward) against
+    represent(detector_backend='opencv', align=True), face by face, and
+  - the live /detect path (detect() on the 320px face view, boxes scaled
+    back, embed(image, boxes) re-aligning each face) against the gallery
+    vector embed_batch() gives the same face.
+Exits with status 1 if a batched vector differs by more than --rtol or a
+live vector is more than --live-tol (cosine distance) from its gallery one.
+
+Run from the repo root:
+    python -m barkwear2.benchmarks.check_deepface_parity
+"""
+import argparse
+import sys
+
+import cv2
+import numpy as np
+
+from barkwear2.benchmarks.bench_embedding_backends import list_photos
+from barkwear2.config import Config
+from barkwear2.services.embedding_backends import DeepFaceBackend
+from barkwear2.services.face_tracker import box_iou
+from barkwear2.services.frame_preprocess import Frame
+
+
+def relative_error(a, b):
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    return float(np.max(np.abs(a - b)) / max(np.max(np.abs(b)), 1e-12))
+
+
+def cosine_distance(a, b):
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    return float(1 - np.dot(a, b) / max(np.linalg.norm(a) * np.linalg.norm(b), 1e-12))
+
+
+def live_embeddings(backend, bgr):
+    """(box, embedding) the way identify_student() computes them for one frame"""
+    frame = Frame(bgr)
+    boxes = [tuple(int(v / frame.face_scale) for v in box) for box in backend.detect(frame.rgb_small)]
+    return list(zip(boxes, backend.embed(frame.rgb, boxes)))
+
+
+def represent(deepface, image, model_name, detector_backend):
+    return {
+        (r['facial_area']['y'], r['facial_area']['x'] + r['facial_area']['w'],
+         r['facial_area']['y'] + r['facial_area']['h'], r['facial_area']['x']): r['embedding']
+        for r in deepface.represent(img_path=image, model_name=model_name, enforce_detection=True,
+                                    detector_backend=detector_backend, align=True)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--photos', default=Config.STUDENT_PHOTO_FOLDER, help='Folder of enrollment photos')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--model', default='Facenet512')
+    parser.add_argument('--rtol', type=float, default=1e-4, help='Max |diff| / max |represent| per vector')
+    parser.add_argument('--live-tol', type=float, default=0.05,
+                        help='Max cosine distance between a live and a gallery vector of the same face')
+    args = parser.parse_args()
+
+    # Same configuration as FaceRecognitionService: BGR arrays, raw vectors
+    backend = DeepFaceBackend(args.model, detector_backend='opencv', channels='bgr', l2_normalize=False)
+    deepface = backend._deepface
+    images = [(p, img) for p, img in ((p, cv2.imread(p)) for p in list_photos(args.photos, args.limit))
+              if img is not None]
+    if not images:
+        print(f"❌ No photos found in {args.photos}")
+        sys.exit(1)
+
+    batched = backend.embed_batch([img for _, img in images])
+    worst, compared, failed = 0.0, 0, False
+    for (path, image), faces in zip(images, batched):
+        try:
+            reference = represent(deepface, image, args.model, 'opencv')
+        except ValueError:
+            reference = {}
+        if len(reference) != len(faces):
+            print(f"❌ {path}: represent found {len(reference)} face(s), embed_batch {len(faces)}")
+            failed = True
+            continue
+        for box, embedding in faces:
+            theirs = reference.get(box)
+            if theirs is None:
+                print(f"❌ {path}: no represent() face at {box}")
+                failed = True
+                continue
+            error = relative_error(embedding, theirs)
+            worst = max(worst, error)
+            compared += 1
+            if error > args.rtol:
+                print(f"❌ {path} embed_batch {box}: relative error {error:.2e}")
+                failed = True
+
+    # Live /detect vectors must land where the gallery's do for the same face
+    live_backend = DeepFaceBackend(args.model)  # get_embedding_backend('deepface'): RGB in, unit vectors
+    gallery = live_backend.embed_batch([cv2.cvtColor(img, cv2.COLOR_BGR2RGB) for _, img in images])
+    live_worst, live_compared = 0.0, 0
+    for (path, image), gallery_faces in zip(images, gallery):
+        for box, embedding in live_embeddings(live_backend, image):
+            matched = max(gallery_faces, key=lambda face: box_iou(face[0], box), default=None)
+            if matched is None or box_iou(matched[0], box) < 0.5:
+                continue  # the 320px view found a face the full-size photo did not
+            distance = cosine_distance(embedding, matched[1])
+            live_worst = max(live_worst, distance)
+            live_compared += 1
+            if distance > args.live_tol:
+                print(f"❌ {path} live {box}: cosine distance {distance:.3f} from the gallery vector")
+                failed = True
+
+    print(f"\n📊 {compared} vector pair(s) over {len(images)} photo(s), worst relative error {worst:.2e} "
+          f"(tolerance {args.rtol:.0e})")
+    print(f"   live vs gallery: {live_compared} face(s), worst cosine distance {live_worst:.3f} "
+          f"(tolerance {args.live_tol}) {'❌' if failed else '✅'}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -19,10 +19,53 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024
 
     STUDENT_PHOTO_FOLDER = os.path.join(os.path.dirname(__file__), '..', 'Student_Pics')
+    FACE_ENCODING_CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', 'ml-models', 'face_encoding_cache.pkl')
     
     # ML Models Config
     YOLO_MODEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'ml-models', 'uniform_detector.pt')
+    UNIFORM_MODEL_DIR = os.path.join(os.path.dirname(__file__), 'uniform-training', 'runs', 'detect',
+                                     'uniform_detector_v2', 'weights')
+    UNIFORM_MODEL_FORMAT = os.environ.get('BARKWEAR_UNIFORM_FORMAT', 'pytorch')  # Key of UNIFORM_MODEL_FILES, e.g. 'onnx_int8'
+    UNIFORM_MODEL_PATH = os.environ.get('BARKWEAR_UNIFORM_MODEL')  # Explicit model file/dir (overrides the two above)
+    YOLO_BATCHING = True           # Batch /detect frames from concurrent kiosks into one YOLO call
+    YOLO_MAX_BATCH = 8             # Frames per batched call
+    YOLO_MAX_WAIT_MS = 5           # Longest a frame waits for others to join its batch
+    YOLO_RESULT_TIMEOUT = 30       # Seconds a /detect request waits for its batched result before failing
+    DETECT_PARALLEL_STAGES = True  # /detect runs YOLO and face identification side by side
+    DETECT_STAGE_WORKERS = 4       # Shared pool for the YOLO stage (bounds concurrent uniform passes)
+    DETECT_DEBUG_TIMINGS = False   # Always add per-stage timings to /detect (or send "debug": true)
     FACE_RECOGNITION_TOLERANCE = 0.6
+    FACE_EMBEDDING_BACKEND = 'dlib'    # Live /detect gallery: 'dlib' (HOG + 128-d) or 'deepface' (OpenCV + Facenet512)
+    FACE_STORE_COMPACT_RATIO = 0.25  # Rewrite the embedding matrix once this share of rows is dead
+    FACE_INDEX_BACKEND = 'exact'   # 'exact' (brute force) or 'ivf' (approximate, for very large galleries)
+    FACE_INDEX_NLIST = 256         # IVF: number of k-means partitions
+    FACE_INDEX_NPROBE = 8          # IVF: partitions scanned per query (higher = better recall, slower)
+    FACE_QUANTIZATION = 'float32'  # In-memory gallery/index rows: 'float32' or 'int8' (per-vector scale)
+    FACE_RERANK_CANDIDATES = 16    # int8 index: re-score this many candidates in float32 from disk (0 = off)
+    FACE_TEMPLATE_COMPACTION = False   # Keep a per-student centroid + distinct templates instead of every photo
+    FACE_TEMPLATE_DIVERSITY = 0.3      # Min distance for an extra template to be kept (dlib units)
+    FACE_TRACK_ENABLED = True          # Reuse identities of stable faces across /detect frames
+    FACE_TRACK_MIN_IOU = 0.5           # Box overlap needed to continue a track (lower = box "jumped")
+    FACE_TRACK_MIN_SIMILARITY = 0.8    # Appearance correlation needed to trust a track
+    FACE_TRACK_REVERIFY_EVERY = 5      # Re-encode a tracked face at least every N frames
+    FACE_TRACK_SESSION_TTL = 30        # Seconds before an idle camera's tracks are dropped
+    FACE_TRACK_MAX_SESSIONS = 64
+    FACE_ENCODING_WORKERS = min(4, os.cpu_count() or 1)  # Processes encoding photos on reload (1 = serial); each loads the face model
+    FACE_GATE_MODE = 'haar'            # Cheap check before HOG: 'haar' (OpenCV cascade), 'motion' or 'off'
+    FACE_CAPTURE_GATE_MODE = 'off'     # Same for /detect-face; Haar misses small distant faces there, check bench_face_localizer's gate recall first
+    FACE_GATE_MOTION_THRESHOLD = 4.0   # 'motion': mean gray-level change (0-255) that counts as movement
+    FACE_GATE_HOLD_FRAMES = 3          # After HOG finds a face, skip the gate for this many frames
+    SCENE_CACHE_ENABLED = True         # /detect reuses a camera's last result while its scene is static
+    SCENE_CACHE_PIXEL_DELTA = 20       # Grey-level change (0-255) for a thumbnail pixel to count as changed
+    SCENE_CACHE_CHANGED_RATIO = 0.02   # Share of changed pixels that forces a full recompute
+    SCENE_CACHE_MAX_REUSE = 15         # Recompute at least every N+1 frames even if nothing moved
+    SCENE_CACHE_TTL = 10               # Seconds an idle camera keeps its reference frame
+    FACE_CAPTURE_COARSE_TO_FINE = True # /detect-face: coarse pass on a small frame, full search only in its ROI
+    FACE_CAPTURE_COARSE_MAX_SIDE = 320 # Longest side of the coarse-pass frame
+    FACE_CAPTURE_ROI_PADDING = 0.5     # ROI = coarse box grown by this share of its size on each side
+    FACE_CAPTURE_SESSION_TTL = 120    # Seconds an idle enrollment capture session keeps its last face box
+    FACE_CAPTURE_MAX_SESSIONS = 32
+    MODEL_WARMUP = os.environ.get('BARKWEAR_MODEL_WARMUP', 'background')  # Backend models: 'background', 'blocking' or 'lazy'
     
     # Attendance Config
     LATE_THRESHOLD_MINUTES = 15
@@ -32,6 +75,25 @@ class Config:
     FRAME_WIDTH = 640
     FRAME_HEIGHT = 480
     
+    # Files written by uniform-training/export_uniform.py and quantize_uniform.py next to best.pt
+    UNIFORM_MODEL_FILES = {
+        'pytorch': 'best.pt',
+        'onnx': 'best.onnx',
+        'openvino': 'best_openvino_model',
+        'onnx_int8': 'best_int8.onnx',
+        'openvino_int8': 'best_int8_openvino_model',
+    }
+
+    @staticmethod
+    def uniform_model_path():
+        """Uniform detector to serve, picked by UNIFORM_MODEL_PATH or UNIFORM_MODEL_FORMAT"""
+        if Config.UNIFORM_MODEL_PATH:
+            return Config.UNIFORM_MODEL_PATH
+        if Config.UNIFORM_MODEL_FORMAT not in Config.UNIFORM_MODEL_FILES:
+            raise ValueError(f"Unknown UNIFORM_MODEL_FORMAT '{Config.UNIFORM_MODEL_FORMAT}', "
+                             f"expected one of {sorted(Config.UNIFORM_MODEL_FILES)}")
+        return os.path.join(Config.UNIFORM_MODEL_DIR, Config.UNIFORM_MODEL_FILES[Config.UNIFORM_MODEL_FORMAT])
+
     @staticmethod
     def init_folders():
         os.makedirs(Config.UPLOAD_FOLDER, exist_ok=True)
@@ -45,6 +45,23 @@ const AdminDashboard: React.FC<AdminDashboardProps> = ({ user, onLogout }) => {
     } catch (err) { console.error('Error loading users:', err); }
   };
 
+  // Repair action: rebuild the backend face gallery from every student photo
+  const handleRebuildFaces = async () => {
+    if (!confirm('Rebuild the face database from all student photos? Live detection keeps working while it runs.')) return;
+    // Checked by the backend against its users table (admin role), never stored here
+    const password = prompt(`Backend password for admin "${user.username}":`);
+    if (!password) return;
+    try {
+      const res = await fetch('http://localhost:5000/reload-faces', {
+        method: 'POST',
+        headers: { Authorization: 'Basic ' + btoa(`${user.username}:${password}`) },
+      });
+      const data = await res.json();
+      if (data.success) alert(`Face database rebuild started (${data.total_encodings} encodings currently served)`);
+      else alert('Error: ' + (data.error || 'Unknown error'));
+    } catch (err: any) { alert('Network error: ' + err.message); }
+  };
+
   const handleAddUser = async () => {
     if (!newUser.username || !newUser.password || !newUser.fullName) { alert('Please fill all fields'); return; }
     if (users.find(u => u.username === newUser.username)) { alert('Username already exists'); return; }
@@ -128,7 +145,13 @@ const AdminDashboard: React.FC<AdminDashboardProps> = ({ user, onLogout }) => {
               </button>
             </div>
 
-            <div style={{ marginTop: '2rem', textAlign: 'center' }}>
+            <div style={{ marginTop: '2rem', textAlign: 'center', display: 'flex', justifyContent: 'center', gap: '1.5rem' }}>
+              <button onClick={handleRebuildFaces}
+                style={{ color: 'rgba(255,255,255,0.8)', fontSize: '0.875rem', textDecoration: 'underline', background: 'none', border: 'none', cursor: 'pointer' }}
+                onMouseEnter={(e) => e.currentTarget.style.color = 'white'}
+                onMouseLeave={(e) => e.currentTarget.style.color = 'rgba(255,255,255,0.8)'}>
+                Rebuild face database
+              </button>
               <button onClick={onLogout}
                 style={{ color: 'rgba(255,255,255,0.8)', fontSize: '0.875rem', textDecoration: 'underline', background: 'none', border: 'none', cursor: 'pointer' }}
                 onMouseEnter={(e) => e.currentTarget.style.color = 'white'}
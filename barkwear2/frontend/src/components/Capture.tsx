@@ -21,6 +21,8 @@ export default function PhotoCapture({ onBack }: PhotoCaptureProps) {
   const [stream, setStream] = useState<MediaStream | null>(null);
   const videoRef = useRef<HTMLVideoElement>(null);
   const canvasRef = useRef<HTMLCanvasElement>(null);
+  // Lets /detect-face look around the last face box first while the student stands still
+  const captureSessionRef = useRef(`capture-${Math.random().toString(36).slice(2, 10)}`);
 
   // ---------- UI State ----------
   const [loading, setLoading] = useState(false);
@@ -89,7 +91,8 @@ export default function PhotoCapture({ onBack }: PhotoCaptureProps) {
         body: JSON.stringify({ 
           image: fullFrame,
           confidence: faceConfidence,
-          quality: detectionQuality
+          quality: detectionQuality,
+          session_id: captureSessionRef.current
         }),
         signal: AbortSignal.timeout(10000),
       });
@@ -225,12 +228,7 @@ export default function PhotoCapture({ onBack }: PhotoCaptureProps) {
       const data = await response.json();
       if (data.success) {
         setSuccess(true);
-
-        // Reload face recognition DB
-        try {
-          await fetch('http://localhost:5000/reload-faces', { method: 'POST' });
-        } catch (_) {}
-
+        // The backend adds the new student to the face gallery itself
         alert(`Student ${studentId} registered successfully!`);
         if (onBack) onBack();
       } else {
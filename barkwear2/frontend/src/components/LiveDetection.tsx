@@ -252,6 +252,8 @@ const LiveDetection: React.FC<LiveDetectionProps> = ({ onBack = () => {} }) => {
   };
 
   const isDetectingRef = useRef(false);
+  // Lets the backend keep face tracks for this kiosk between frames
+  const cameraIdRef = useRef(`kiosk-${Math.random().toString(36).slice(2, 10)}`);
 
   // ── Detection loop ──
   const doDetection = async () => {
@@ -268,7 +270,11 @@ const LiveDetection: React.FC<LiveDetectionProps> = ({ onBack = () => {} }) => {
       const response = await fetch(API_URL, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ image: imageData }),
+        body: JSON.stringify({
+          image: imageData,
+          schedule_id: selectedSchedule?.schedule_id,
+          camera_id: cameraIdRef.current,
+        }),
         signal: AbortSignal.timeout(10000)
       });
       if (!response.ok) throw new Error(`HTTP ${response.status}`);
@@ -303,7 +309,6 @@ const LiveDetection: React.FC<LiveDetectionProps> = ({ onBack = () => {} }) => {
     setIsRecording(true); setIsPaused(false);
     setDetectedStudentName(''); setDetectedStudentId('');
     setSessionStudents(new Set());
-    try { await fetch('http://localhost:5000/reload-faces', { method: 'POST' }); addLog('🔄 Face DB refreshed'); } catch (_) {}
     await startCamera();
     setTimeout(() => {
       doDetection();
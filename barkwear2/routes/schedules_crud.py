@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
 from barkwear2.utils.db import db
+from barkwear2.services.roster_cache import roster_cache
+from barkwear2.services.scene_cache import scene_cache
 
 schedule_bp = Blueprint('schedule', __name__, url_prefix='/schedules')
 
@@ -107,6 +109,8 @@ def update_schedule(schedule_id):
             subject_code, subject_name, block, year_level, day_of_week,
             start_time, end_time, room_code, instructor_name, schedule_id
         ))
+        roster_cache.invalidate(schedule_id)
+        scene_cache.invalidate()
         return jsonify({'success': True, 'affected': affected}), 200
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -117,6 +121,8 @@ def delete_schedule(schedule_id):
     try:
         query = "UPDATE schedules SET is_active = FALSE WHERE schedule_id = %s"
         affected = db.execute_update(query, (schedule_id,))
+        roster_cache.invalidate(schedule_id)
+        scene_cache.invalidate()
         return jsonify({'success': True, 'affected': affected}), 200
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
\ No newline at end of file
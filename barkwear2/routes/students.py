@@ -3,7 +3,11 @@ Students API Routes - Pure MySQL
 """
 from flask import Blueprint, request, jsonify, send_file
 from barkwear2.utils.db import db
-from barkwear2.services.face_service import FaceRecognitionService
+from barkwear2.services.face_service import FaceRecognitionService, delete_stored_encoding
+from barkwear2.services.roster_cache import roster_cache
+from barkwear2.services.scene_cache import scene_cache
+from barkwear2.services.face_db import face_db, format_student_name
+from barkwear2.services.model_registry import model_registry
 from barkwear2.config import Config
 import cv2
 import numpy as np
@@ -13,7 +17,19 @@ from pathlib import Path
 from werkzeug.utils import secure_filename
 
 students_bp = Blueprint('students', __name__, url_prefix='/students')
-face_service = FaceRecognitionService()
+
+# Facenet512 (DeepFace) for enrollment, built on first use or by the backend's warm-up
+model_registry.register(
+    'enrollment_faces',
+    FaceRecognitionService,
+    warm_up=lambda service: service.warm_up(),
+    priority=50  # enrollment only; warms after the /detect models
+)
+
+
+def get_face_service():
+    return model_registry.get('enrollment_faces')
+
 
 def save_student_photos(student_id, photos_base64):
     """
@@ -48,6 +64,12 @@ def save_student_photos(student_id, photos_base64):
     
     return relative_folder
 
+def _photo_folder_name(student):
+    """Folder under Student_Pics (and face gallery ID) for a student row"""
+    if student.get('photo_folder'):
+        return os.path.basename(student['photo_folder'])
+    return secure_filename(student['student_id'])
+
 @students_bp.route('/', methods=['GET'])
 def get_all_students():
     """Get all active students"""
@@ -125,7 +147,7 @@ def create_student():
                 image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
                 
                 # Save face encoding
-                result = face_service.save_face_encoding(data['student_id'], image_rgb)
+                result = get_face_service().save_face_encoding(data['student_id'], image_rgb)
                 if not result['success']:
                     return jsonify({'success': False, 'error': result['message']}), 400
                 face_encoding_path = result['encoding_path']
@@ -158,6 +180,16 @@ def create_student():
             face_encoding_path,
             photo_folder
         ))
+        roster_cache.invalidate()
+        scene_cache.invalidate()
+        
+        # ---------- Add just this student to the live face gallery ----------
+        try:
+            added = face_db.add_student(os.path.basename(photo_folder), format_student_name(data))
+            if not added:
+                print(f"⚠️ No face found in enrollment photos for {data['student_id']}")
+        except Exception as e:
+            print(f"⚠️ Could not add {data['student_id']} to the face gallery: {e}")
         
         # ---------- Return created student ----------
         student = db.execute_one(
@@ -249,6 +281,8 @@ def update_student(student_id):
         values.append(student_id)
         update_query = f"UPDATE students SET {', '.join(update_fields)} WHERE student_id = %s"
         db.execute_update(update_query, tuple(values))
+        roster_cache.invalidate()
+        scene_cache.invalidate()
         
         # Get updated student
         updated_student = db.execute_one(
@@ -256,6 +290,10 @@ def update_student(student_id):
             (student_id,)
         )
         
+        # Keep the name shown by live recognition in sync
+        if any(field in data for field in ('first_name', 'middle_name', 'last_name')):
+            face_db.rename_student(_photo_folder_name(updated_student), format_student_name(updated_student))
+        
         return jsonify({
             'success': True,
             'message': 'Student updated successfully',
@@ -278,9 +316,17 @@ def delete_student(student_id):
         # Soft delete
         update_query = "UPDATE students SET is_active = FALSE WHERE student_id = %s"
         db.execute_update(update_query, (student_id,))
+        # Live recognition stops matching the student before anything else
+        face_db.remove_student(_photo_folder_name(student))
+        roster_cache.invalidate()
+        scene_cache.invalidate()
         
-        # Delete face encoding (if any)
-        face_service.delete_face_encoding(student_id)
+        # Delete face encoding (if any); building Facenet512 just for this is not worth it
+        model_registry.if_loaded(
+            'enrollment_faces',
+            lambda service: service.delete_face_encoding(student_id),
+            lambda: delete_stored_encoding(student_id)
+        )
         
         # Note: We do NOT delete the photo folder – keep for record keeping.
         
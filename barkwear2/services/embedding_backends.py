@@ -0,0 +1,277 @@
+"""
+Face embedding backends: detect, align and embed behind one interface
+dlib (HOG + 128-d ResNet) and DeepFace (OpenCV detector + Facenet512) are interchangeable via Config
+"""
+import threading
+from abc import ABC, abstractmethod
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from barkwear2.config import Config
+from barkwear2.services.face_tracker import box_iou
+
+
+class EmbeddingBackend(ABC):
+    """
+    Images are RGB uint8 arrays and boxes are (top, right, bottom, left) in
+    image coordinates, whatever the backend. Embeddings from one backend are
+    only comparable with embeddings from the same backend.
+    """
+
+    name = ''
+    dim = 0
+    default_threshold = 0.6          # Euclidean match threshold for FaceGallery
+    threshold_range = (0.3, 0.8)     # Range /set-face-threshold clamps to
+
+    def load_image(self, path):
+        """Decode an image file to RGB"""
+        with Image.open(path) as img:
+            return np.array(img.convert('RGB'))
+
+    def warm_up(self):
+        """Load model weights now instead of on the first request"""
+
+    @abstractmethod
+    def detect(self, image, upsample=1):
+        """Face boxes in `image`"""
+
+    @abstractmethod
+    def align(self, image, boxes):
+        """Aligned face chips (what the embedding model sees), one per box"""
+
+    @abstractmethod
+    def embed(self, image, boxes=None):
+        """
+        Embeddings of the faces at `boxes` (detected first when None)
+
+        Returns:
+            list: One float32 vector per face
+        """
+
+    def embed_batch(self, images):
+        """
+        Detect and embed every face in several images in as few model calls as possible
+
+        Returns:
+            list: Per image, a list of (box, embedding)
+        """
+        results = []
+        for image in images:
+            boxes = self.detect(image)
+            results.append(list(zip(boxes, self.embed(image, boxes))))
+        return results
+
+    def detect_and_embed(self, image):
+        """(box, embedding) for every face in one image"""
+        return self.embed_batch([image])[0]
+
+
+class DlibBackend(EmbeddingBackend):
+    """face_recognition / dlib: HOG detector, 5-point alignment, 128-d ResNet"""
+
+    name = 'dlib'
+    dim = 128
+    default_threshold = 0.6
+    threshold_range = (0.3, 0.8)
+
+    def __init__(self, model='hog', num_jitters=1):
+        import face_recognition
+        self._fr = face_recognition
+        self.model = model
+        self.num_jitters = num_jitters
+
+    def load_image(self, path):
+        return self._fr.load_image_file(path)
+
+    def warm_up(self):
+        # dlib loads its models when face_recognition is imported; one pass
+        # still pays the first-call allocation cost up front
+        blank = np.zeros((150, 150, 3), dtype=np.uint8)
+        self.embed(blank, [(0, 150, 150, 0)])
+
+    def detect(self, image, upsample=1):
+        return self._fr.face_locations(image, number_of_times_to_upsample=upsample, model=self.model)
+
+    def align(self, image, boxes):
+        import dlib
+        api = self._fr.api
+        return [
+            dlib.get_face_chip(image, api.pose_predictor_5_point(image, api._css_to_rect(box)), size=150)
+            for box in boxes
+        ]
+
+    def embed(self, image, boxes=None):
+        encodings = self._fr.face_encodings(image, boxes, num_jitters=self.num_jitters)
+        return [np.asarray(enc, dtype=np.float32) for enc in encodings]
+
+    def embed_batch(self, images):
+        import dlib
+        api = self._fr.api
+        boxes = [self.detect(image) for image in images]
+        shapes = []
+        for image, image_boxes in zip(images, boxes):
+            detections = dlib.full_object_detections()
+            detections.extend(api._raw_face_landmarks(image, image_boxes, model='small'))
+            shapes.append(detections)
+        # dlib's batch overload runs every face of every image through the net at once
+        descriptors = api.face_encoder.compute_face_descriptor(list(images), shapes, self.num_jitters)
+        return [
+            [(box, np.asarray(vec, dtype=np.float32)) for box, vec in zip(image_boxes, image_descriptors)]
+            for image_boxes, image_descriptors in zip(boxes, descriptors)
+        ]
+
+
+class DeepFaceBackend(EmbeddingBackend):
+    """
+    DeepFace: OpenCV (or any DeepFace) detector, eye alignment, Facenet512
+
+    DeepFace reads arrays as BGR. `channels` says what callers pass in:
+    'rgb' (the backend interface) is converted, 'bgr' is handed over as is.
+    With `l2_normalize`, embeddings are unit length so Euclidean thresholds
+    behave like DeepFace's euclidean_l2 metric.
+    """
+
+    name = 'deepface'
+    dim = 512
+    default_threshold = 1.04       # DeepFace's Facenet512 euclidean_l2 threshold
+    threshold_range = (0.7, 1.3)
+    align_padding = 0.5            # align(): crop margin per side, as a fraction of the box
+    align_min_iou = 0.4            # align(): least overlap for a re-detected face to count as the box
+
+    def __init__(self, model_name='Facenet512', detector_backend='opencv', channels='rgb', l2_normalize=True):
+        from deepface import DeepFace
+        self._deepface = DeepFace
+        self.model_name = model_name
+        self.detector_backend = detector_backend
+        self.channels = channels
+        self.l2_normalize = l2_normalize
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _build(self):
+        """(keras model, (height, width) input size), built once"""
+        with self._lock:
+            if self._model is None:
+                client = self._deepface.build_model(self.model_name)
+                keras_model = getattr(client, 'model', client)
+                height, width = keras_model.input_shape[1:3]
+                self._model = (keras_model, (height, width))
+            return self._model
+
+    def warm_up(self):
+        keras_model, (height, width) = self._build()
+        keras_model.predict(np.zeros((1, height, width, 3), dtype=np.float32), verbose=0)
+        self._extract(np.zeros((height, width, 3), dtype=np.uint8))  # loads the detector
+
+    def _to_deepface(self, image):
+        return cv2.cvtColor(image, cv2.COLOR_RGB2BGR) if self.channels == 'rgb' else image
+
+    def _extract(self, image, align=True):
+        try:
+            return self._deepface.extract_faces(
+                img_path=self._to_deepface(image),
+                detector_backend=self.detector_backend,
+                enforce_detection=True,
+                align=align
+            )
+        except ValueError:
+            return []  # DeepFace raises when no face is found
+
+    @staticmethod
+    def _box(facial_area):
+        x, y, w, h = facial_area['x'], facial_area['y'], facial_area['w'], facial_area['h']
+        return (y, x + w, y + h, x)
+
+    def _preprocess(self, face, size):
+        """
+        One RGB face chip (as extract_faces returns it) to the exact model
+        input DeepFace.represent builds: flip to BGR, letterbox with
+        DeepFace's resize_image and its default
+        'base' normalization. Any difference here makes these vectors
+        incomparable with the ones already in the embedding store.
+        """
+        from deepface.modules import preprocessing
+        if face.dtype == np.uint8:
+            face = face / 255  # fallback crops from align(); extract_faces chips are already 0-1
+        img = face[:, :, ::-1]  # represent(): "rgb to bgr"
+        img = preprocessing.resize_image(img=img, target_size=size)  # (height, width)
+        return preprocessing.normalize_input(img=img, normalization='base')
+
+    def _forward(self, faces):
+        """One model call for every face chip"""
+        if not faces:
+            return []
+        keras_model, size = self._build()
+        batch = np.concatenate([self._preprocess(face, size) for face in faces]).astype(np.float32)
+        vectors = np.asarray(keras_model.predict(batch, verbose=0), dtype=np.float32)
+        if self.l2_normalize:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return list(vectors)
+
+    def detect(self, image, upsample=1):
+        # DeepFace detectors have no upsampling knob
+        return [self._box(face['facial_area']) for face in self._extract(image, align=False)]
+
+    def align(self, image, boxes):
+        """
+        Eye-aligned chips like the gallery's: extract_faces(align=True) runs on
+        a padded crop around each box and the face overlapping the box is kept.
+        A box the detector does not find again falls back to the plain crop.
+        Chips are RGB, like extract_faces' output, for _preprocess()
+        """
+        height, width = image.shape[:2]
+        chips = []
+        for box in boxes:
+            top, right, bottom, left = box
+            pad_y, pad_x = int((bottom - top) * self.align_padding), int((right - left) * self.align_padding)
+            y0, x0 = max(0, top - pad_y), max(0, left - pad_x)
+            region = image[y0:min(height, bottom + pad_y), x0:min(width, right + pad_x)]
+
+            best, best_iou = None, self.align_min_iou
+            for face in self._extract(region):
+                top_, right_, bottom_, left_ = self._box(face['facial_area'])
+                iou = box_iou((top_ + y0, right_ + x0, bottom_ + y0, left_ + x0), box)
+                if iou >= best_iou:
+                    best, best_iou = face['face'], iou
+            if best is None:
+                crop = image[max(0, top):bottom, max(0, left):right]
+                best = crop if self.channels == 'rgb' else np.ascontiguousarray(crop[:, :, ::-1])
+            chips.append(best)
+        return chips
+
+    def embed(self, image, boxes=None):
+        if boxes is None:
+            return [embedding for _, embedding in self.detect_and_embed(image)]
+        return self._forward(self.align(image, boxes))
+
+    def embed_batch(self, images):
+        boxes, faces = [], []
+        for image in images:
+            extracted = self._extract(image)
+            boxes.append([self._box(face['facial_area']) for face in extracted])
+            faces.extend(face['face'] for face in extracted)
+
+        embeddings = iter(self._forward(faces))
+        return [[(box, next(embeddings)) for box in image_boxes] for image_boxes in boxes]
+
+
+BACKENDS = {
+    'dlib': DlibBackend,
+    'deepface': DeepFaceBackend,
+}
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def get_embedding_backend(name=None):
+    """Shared backend instance; Config.FACE_EMBEDDING_BACKEND when no name is given"""
+    name = name or Config.FACE_EMBEDDING_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown face embedding backend '{name}' (expected one of {sorted(BACKENDS)})")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = BACKENDS[name]()
+        return _instances[name]
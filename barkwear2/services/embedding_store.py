@@ -0,0 +1,191 @@
+"""
+Memory-mapped face embedding store
+One float32 matrix file plus a JSON ID table, replacing one .pkl per student
+"""
+import json
+import os
+import pickle
+import threading
+
+import numpy as np
+
+INDEX_FILE = 'embeddings.json'
+
+
+class EmbeddingStore:
+    """
+    Layout inside `folder`:
+        embeddings.json      {"dim": 512, "matrix": "embeddings-<gen>.f32", "ids": [...]}
+        embeddings-<gen>.f32 raw float32 rows, row i belongs to ids[i]
+
+    The matrix is opened read-only with np.memmap, so startup does not parse
+    anything per student and several worker processes share the same pages.
+    Adds append a row; deletes (and re-adds of an existing ID) only blank the
+    old row's ID. Once more than `compact_ratio` of the rows are dead the live
+    rows are rewritten into a new generation file and the ID table is swapped
+    atomically, so a crash never leaves the table pointing at a half-written
+    matrix.
+
+    Writers hold a lock across the file write, the ID-table update and the
+    remap. They build new `ids`/`rows`/`matrix` objects and publish them with
+    a single assignment, so a concurrent get()/items() sees either the old
+    or the new state, never a mix (and never an unmapped matrix).
+    """
+
+    def __init__(self, folder, dim, compact_ratio=0.25):
+        self.folder = folder
+        self.dim = dim
+        self.compact_ratio = compact_ratio
+        self.index_path = os.path.join(folder, INDEX_FILE)
+        self.matrix_name = 'embeddings-0.f32'
+        self.ids = []   # row -> student_id, None for dead rows
+        self.rows = {}  # student_id -> live row
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+        self._view = (self.rows, self.matrix)  # what readers use, swapped in one assignment
+        self._lock = threading.Lock()
+
+    @property
+    def matrix_path(self):
+        return os.path.join(self.folder, self.matrix_name)
+
+    def open(self):
+        """(Re)load the ID table and map the matrix"""
+        os.makedirs(self.folder, exist_ok=True)
+        with self._lock:
+            ids, matrix_name = [], self.matrix_name
+            if os.path.exists(self.index_path):
+                with open(self.index_path, 'r') as f:
+                    meta = json.load(f)
+                if meta['dim'] != self.dim:
+                    raise ValueError(f"Embedding store holds {meta['dim']}-d vectors, expected {self.dim}-d")
+                matrix_name, ids = meta['matrix'], meta['ids']
+            self.matrix_name = matrix_name
+
+            # Drop any rows appended after the last ID-table write (interrupted add)
+            expected = len(ids) * self.dim * 4
+            if os.path.exists(self.matrix_path) and os.path.getsize(self.matrix_path) > expected:
+                with open(self.matrix_path, 'r+b') as f:
+                    f.truncate(expected)
+            self._publish(ids)
+        return self
+
+    def _map(self, n_rows):
+        """A fresh read-only mapping of the first `n_rows` rows of the current matrix file"""
+        if n_rows:
+            return np.memmap(self.matrix_path, dtype=np.float32, mode='r', shape=(n_rows, self.dim))
+        return np.zeros((0, self.dim), dtype=np.float32)
+
+    def _publish(self, ids):
+        """Map the matrix for `ids`, then swap in the new state (call with the lock held)"""
+        rows = {sid: row for row, sid in enumerate(ids) if sid is not None}
+        matrix = self._map(len(ids))
+        self.ids, self.rows, self.matrix = ids, rows, matrix
+        self._view = (rows, matrix)
+
+    def _write_index(self, ids, matrix_name=None):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'dim': self.dim, 'matrix': matrix_name or self.matrix_name, 'ids': ids}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def __len__(self):
+        return len(self._view[0])
+
+    def __contains__(self, student_id):
+        return student_id in self._view[0]
+
+    def get(self, student_id):
+        rows, matrix = self._view
+        row = rows.get(student_id)
+        return None if row is None else matrix[row]
+
+    def items(self):
+        """(student_id, embedding) for every live row; embeddings are memmap views"""
+        rows, matrix = self._view
+        return [(sid, matrix[row]) for sid, row in rows.items()]
+
+    def add_many(self, embeddings):
+        """Append {student_id: embedding} in one write, replacing existing IDs"""
+        if not embeddings:
+            return
+        block = np.asarray(list(embeddings.values()), dtype=np.float32).reshape(len(embeddings), self.dim)
+
+        with self._lock:
+            ids = list(self.ids)
+            for sid in embeddings:
+                old_row = self.rows.get(sid)
+                if old_row is not None:
+                    ids[old_row] = None
+            ids.extend(embeddings)
+            # Rows past the ID table are ignored (and truncated by open()) until the table is written
+            with open(self.matrix_path, 'ab') as f:
+                f.write(block.tobytes())
+            self._write_index(ids)
+            self._publish(ids)
+            self._maybe_compact()
+
+    def add(self, student_id, embedding):
+        self.add_many({student_id: embedding})
+
+    def delete(self, student_id):
+        with self._lock:
+            row = self.rows.get(student_id)
+            if row is None:
+                return False
+            ids = list(self.ids)
+            ids[row] = None
+            self._write_index(ids)
+            self._publish(ids)
+            self._maybe_compact()
+        return True
+
+    def dead_rows(self):
+        return len(self.ids) - len(self.rows)
+
+    def _maybe_compact(self):
+        if self.ids and self.dead_rows() / len(self.ids) > self.compact_ratio:
+            self._compact()
+
+    def compact(self):
+        """Rewrite only the live rows into a new generation and drop the old file"""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        live = list(self.rows.items())
+        old_path = self.matrix_path
+        generation = int(self.matrix_name.split('-')[1].split('.')[0]) + 1
+        matrix_name = f'embeddings-{generation}.f32'
+
+        live_rows = np.asarray(self.matrix[[row for _, row in live]], dtype=np.float32)
+        with open(os.path.join(self.folder, matrix_name), 'wb') as f:
+            f.write(live_rows.tobytes())
+        ids = [sid for sid, _ in live]
+        self._write_index(ids, matrix_name)
+        self.matrix_name = matrix_name
+        self._publish(ids)
+        try:
+            os.remove(old_path)
+        except OSError:
+            # Still mapped elsewhere (e.g. on Windows) — harmless, it is no longer referenced
+            pass
+
+    def import_pickles(self, folder):
+        """
+        One-step migration from the old one-.pkl-per-student layout
+
+        Returns:
+            int: Number of embeddings imported
+        """
+        embeddings = {}
+        for filename in sorted(os.listdir(folder)):
+            if not filename.endswith('.pkl'):
+                continue
+            student_id = filename[:-len('.pkl')]
+            try:
+                with open(os.path.join(folder, filename), 'rb') as f:
+                    embeddings[student_id] = np.asarray(pickle.load(f), dtype=np.float32)
+            except Exception as e:
+                print(f"Error loading encoding for {student_id}: {e}")
+        self.add_many(embeddings)
+        return len(embeddings)
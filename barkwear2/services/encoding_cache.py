@@ -0,0 +1,129 @@
+"""
+On-disk cache of enrollment-photo face encodings
+Lets reload_face_db() skip photos that have not changed since the last run
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+
+CACHE_VERSION = 1
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-1 of a file's contents"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class EncodingCache:
+    """
+    Maps photo path -> (size, mtime, sha1, encoding)
+
+    A photo is a hit when size and mtime match. If they don't, the content
+    hash is compared so a touched-but-identical file is still reused.
+    `encoding` is None for photos where no face was found, so those are
+    not re-tried on every reload either.
+    """
+
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self.entries = {}  # {photo_path: {'size', 'mtime', 'sha1', 'encoding'}}
+        self._changed = set()  # photo paths stored or refreshed since load()
+        self._dirty = False
+
+    def load(self):
+        """Read the whole cache file in one go"""
+        self.entries = {}
+        self._changed = set()
+        self._dirty = False
+        if not os.path.exists(self.cache_path):
+            return self
+
+        try:
+            with open(self.cache_path, 'rb') as f:
+                data = pickle.load(f)
+            if data.get('version') == CACHE_VERSION:
+                self.entries = data.get('entries', {})
+            else:
+                print("⚠️ Encoding cache version changed — rebuilding")
+        except Exception as e:
+            print(f"⚠️ Could not read encoding cache {self.cache_path}: {e}")
+        return self
+
+    def save(self):
+        """Write the cache atomically (unique tmp file + rename)"""
+        if not self._dirty:
+            return
+        folder = os.path.dirname(os.path.abspath(self.cache_path))
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=os.path.basename(self.cache_path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump({'version': CACHE_VERSION, 'entries': self.entries}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.cache_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        self._dirty = False
+
+    def lookup(self, photo_path):
+        """
+        Return (hit, encoding) for a photo
+
+        On a miss the caller should encode the photo and call store().
+        """
+        entry = self.entries.get(photo_path)
+        if entry is None:
+            return False, None
+
+        try:
+            stat = os.stat(photo_path)
+        except OSError:
+            return False, None
+
+        if entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            return True, entry['encoding']
+
+        if entry['size'] == stat.st_size and entry['sha1'] == file_digest(photo_path):
+            entry['mtime'] = stat.st_mtime
+            self._changed.add(photo_path)
+            self._dirty = True
+            return True, entry['encoding']
+
+        return False, None
+
+    def store(self, photo_path, encoding):
+        """Record the encoding (or None) for a photo as it is on disk now"""
+        stat = os.stat(photo_path)
+        self.entries[photo_path] = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'sha1': file_digest(photo_path),
+            'encoding': encoding,
+        }
+        self._changed.add(photo_path)
+        self._dirty = True
+
+    def changes(self):
+        """Entries stored or refreshed since load(), to apply() to a fresher copy"""
+        return {p: self.entries[p] for p in self._changed if p in self.entries}
+
+    def apply(self, changes):
+        """Take changes() made on another copy of the cache"""
+        if changes:
+            self.entries.update(changes)
+            self._dirty = True
+
+    def prune(self, live_paths):
+        """Drop entries for photos that no longer exist"""
+        stale = [p for p in self.entries if p not in live_paths]
+        for photo_path in stale:
+            del self.entries[photo_path]
+        if stale:
+            self._dirty = True
+        return len(stale)
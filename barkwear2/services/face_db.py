@@ -0,0 +1,337 @@
+"""
+Live face gallery used by /detect
+Rebuilt in the background into a new immutable FaceGallery that is swapped in atomically
+"""
+import os
+import threading
+import time
+
+from barkwear2.config import Config
+from barkwear2.utils.db import db
+from barkwear2.services.embedding_backends import get_embedding_backend
+from barkwear2.services.encoding_cache import EncodingCache
+from barkwear2.services.face_encoder import encode_photos
+from barkwear2.services.face_gallery import FaceGallery, compact_student_templates
+from barkwear2.services.scene_cache import scene_cache
+
+
+def format_student_name(row: dict) -> str:
+    parts = [row['first_name']]
+    if row.get('middle_name'):
+        parts.append(row['middle_name'])
+    parts.append(row['last_name'])
+    return ' '.join(parts)
+
+
+def get_student_name_from_db(student_id: str) -> str:
+    """Look up a student's full name from the database by their ID."""
+    try:
+        row = db.execute_one(
+            "SELECT first_name, middle_name, last_name FROM students WHERE student_id = %s",
+            (student_id,)
+        )
+        if row:
+            return format_student_name(row)
+    except Exception as e:
+        print(f"⚠️ DB lookup failed for {student_id}: {e}")
+    return ''
+
+
+def get_students_from_db() -> tuple:
+    """
+    Every student in one query
+
+    Returns:
+        (names, inactive): {student_id: full name} of active students and
+        the set of soft-deleted IDs, whose photo folders are kept but not served
+    """
+    try:
+        rows = db.execute_query(
+            "SELECT student_id, first_name, middle_name, last_name, is_active FROM students"
+        )
+    except Exception as e:
+        print(f"⚠️ Bulk student lookup failed: {e}")
+        return {}, set()
+    names = {row['student_id']: format_student_name(row) for row in rows if row['is_active']}
+    inactive = {row['student_id'] for row in rows if not row['is_active']}
+    return names, inactive
+
+
+def encoding_cache_path(backend_name=None):
+    """Each embedding backend gets its own cache file; dlib keeps the original one"""
+    backend_name = backend_name or get_embedding_backend().name
+    if backend_name == 'dlib':
+        return Config.FACE_ENCODING_CACHE_PATH
+    root, ext = os.path.splitext(Config.FACE_ENCODING_CACHE_PATH)
+    return f"{root}.{backend_name}{ext}"
+
+
+# Held across each load / modify / save of an encoding cache file, so a
+# rebuild and an enrollment never overwrite each other's new entries.
+# Encoding itself runs outside it.
+_encoding_cache_lock = threading.Lock()
+
+
+def _load_encoding_cache():
+    with _encoding_cache_lock:
+        return EncodingCache(encoding_cache_path()).load()
+
+
+def _save_encoding_cache(cache, live_paths=None):
+    """
+    Apply `cache`'s changes to the file as it is on disk now and write it
+
+    Args:
+        live_paths: If given, entries for any other photo are dropped
+
+    Returns:
+        int: Number of entries pruned
+    """
+    with _encoding_cache_lock:
+        current = EncodingCache(cache.cache_path).load()
+        current.apply(cache.changes())
+        removed = current.prune(live_paths) if live_paths is not None else 0
+        try:
+            current.save()
+        except Exception as e:
+            print(f"⚠️ Could not write encoding cache: {e}")
+    return removed
+
+
+def _list_photos(folder_path):
+    return [
+        os.path.join(folder_path, img_file)
+        for img_file in os.listdir(folder_path)
+        if img_file.lower().endswith(('.jpg', '.jpeg', '.png'))
+    ]
+
+
+def _print_reload_progress(done, total):
+    if done == total or done % max(1, total // 10) == 0:
+        print(f"   🔄 Encoded {done}/{total} photo(s)")
+
+
+def build_gallery(progress=_print_reload_progress):
+    """
+    Build a FaceGallery from the student photo folder
+
+    Cached photos are not re-encoded; new or changed ones are encoded across
+    Config.FACE_ENCODING_WORKERS processes. `progress(done, total)` is called
+    as photos finish encoding.
+    """
+    photo_root = Config.STUDENT_PHOTO_FOLDER
+    if not os.path.isdir(photo_root):
+        print(f"⚠️ Student photo folder not found: {photo_root}")
+        return FaceGallery.empty()
+
+    cache = _load_encoding_cache()
+    student_names, inactive = get_students_from_db()
+    photos = []  # (student_id, display name, photo path) in folder order
+    cached = {}
+    misses = []
+
+    for folder_name in os.listdir(photo_root):
+        folder_path = os.path.join(photo_root, folder_name)
+        if not os.path.isdir(folder_path):
+            continue
+
+        student_id = folder_name.strip()
+        if student_id in inactive:
+            continue
+        student_display = student_names.get(student_id, '')
+
+        if not student_display:
+            parts = folder_name.split('_', 1)
+            student_display = parts[1].replace('_', ' ') if len(parts) == 2 else folder_name
+
+        for img_path in _list_photos(folder_path):
+            photos.append((student_id, student_display, img_path))
+            hit, encoding = cache.lookup(img_path)
+            if hit:
+                cached[img_path] = encoding
+            else:
+                misses.append(img_path)
+
+    encoded = encode_photos(misses, workers=Config.FACE_ENCODING_WORKERS, progress=progress)
+    for img_path, encoding in encoded.items():
+        cache.store(img_path, encoding)
+    cached.update(encoded)
+
+    entries = []
+    for student_id, student_display, img_path in photos:
+        encoding = cached.get(img_path)
+        if encoding is not None:
+            entries.append({
+                'student_id': student_id,
+                'name': student_display,
+                'encoding': encoding
+            })
+    gallery = FaceGallery.from_entries(entries)
+    if Config.FACE_TEMPLATE_COMPACTION:
+        compacted = gallery.compacted(Config.FACE_TEMPLATE_DIVERSITY)
+        print(f"   🗜️ Compacted {len(gallery)} template(s) to {len(compacted)} "
+              f"({gallery.nbytes // 1024} KB → {compacted.nbytes // 1024} KB)")
+        gallery = compacted
+    if Config.FACE_QUANTIZATION != 'float32':
+        gallery = gallery.quantized(Config.FACE_QUANTIZATION)
+
+    removed = _save_encoding_cache(cache, {img_path for _, _, img_path in photos})
+
+    print(f"✅ Face DB loaded — {len(gallery)} encoding(s) "
+          f"({len(encoded)} newly encoded, {removed} removed from cache)")
+    return gallery
+
+
+def encode_student_photos(folder_name):
+    """Encodings of one student's enrollment photos, through the encoding cache"""
+    folder_path = os.path.join(Config.STUDENT_PHOTO_FOLDER, folder_name)
+    if not os.path.isdir(folder_path):
+        return []
+
+    cache = _load_encoding_cache()
+    photo_paths = _list_photos(folder_path)
+    results = {}
+    misses = []
+    for img_path in photo_paths:
+        hit, encoding = cache.lookup(img_path)
+        if hit:
+            results[img_path] = encoding
+        else:
+            misses.append(img_path)
+
+    encoded = encode_photos(misses, workers=1)
+    for img_path, encoding in encoded.items():
+        cache.store(img_path, encoding)
+    results.update(encoded)
+    _save_encoding_cache(cache)
+
+    encodings = [results[p] for p in photo_paths if results.get(p) is not None]
+    if encodings and Config.FACE_TEMPLATE_COMPACTION:
+        encodings = compact_student_templates(encodings, Config.FACE_TEMPLATE_DIVERSITY)
+    return encodings
+
+
+class FaceDatabase:
+    """
+    Holds the gallery currently being served plus at most one background build
+
+    Readers just take `face_db.gallery` once per request: a rebuild never
+    mutates it, it replaces the reference when the new snapshot is complete.
+    Reload requests that arrive during a build are collapsed into a single
+    follow-up build, so photos added mid-build are still picked up.
+
+    Enrolling, renaming or deleting one student edits the served snapshot
+    directly (copy-on-write); edits made while a full build is running are
+    replayed onto that build's result before it is swapped in.
+    """
+
+    def __init__(self):
+        self.gallery = FaceGallery.empty()
+        self.version = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._rerun = False
+        self._progress = {'done': 0, 'total': 0}
+        self._last_build = {}
+        self._pending_edits = []  # edits to replay onto the build in flight
+
+    def _swap(self, gallery):
+        with self._lock:
+            for edit in self._pending_edits:
+                gallery = edit(gallery)
+            self._pending_edits = []
+            self.gallery = gallery
+            self.version += 1
+        scene_cache.invalidate()  # cached /detect responses may name students that changed
+
+    def _apply(self, edit):
+        # Edits are idempotent (replace / remove / rename one student), so
+        # replaying one onto a build that already saw it is harmless
+        with self._lock:
+            self.gallery = edit(self.gallery)
+            self.version += 1
+            if self._thread is not None and self._thread.is_alive():
+                self._pending_edits.append(edit)
+        scene_cache.invalidate()
+
+    def add_student(self, folder_name, name):
+        """
+        Encode one student's photos and put them in the live gallery
+
+        Returns:
+            int: Number of encodings added (0 if no face was found)
+        """
+        student_id = folder_name.strip()
+        encodings = encode_student_photos(folder_name)
+        self._apply(lambda gallery: gallery.with_student(student_id, name, encodings))
+        return len(encodings)
+
+    def remove_student(self, folder_name):
+        student_id = folder_name.strip()
+        self._apply(lambda gallery: gallery.without_student(student_id))
+
+    def rename_student(self, folder_name, name):
+        student_id = folder_name.strip()
+        self._apply(lambda gallery: gallery.renamed(student_id, name))
+
+    def reload(self):
+        """Rebuild on the calling thread (used at startup)"""
+        started = time.time()
+        self._swap(build_gallery(progress=self._track_progress))
+        self._last_build = {'seconds': round(time.time() - started, 2), 'finished_at': time.time(), 'error': None}
+
+    def request_reload(self):
+        """Start a background rebuild, or queue one behind the build already running"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                self._rerun = True
+                return self._status_locked()
+            self._rerun = False
+            self._progress = {'done': 0, 'total': 0}
+            self._pending_edits = []
+            self._thread = threading.Thread(target=self._build_loop, name='face-db-reload', daemon=True)
+            self._thread.start()
+            return self._status_locked()
+
+    def _build_loop(self):
+        while True:
+            started = time.time()
+            try:
+                self._swap(build_gallery(progress=self._track_progress))
+                error = None
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                error = str(e)  # keep serving the previous snapshot
+            self._last_build = {'seconds': round(time.time() - started, 2), 'finished_at': time.time(),
+                                'error': error}
+            with self._lock:
+                if not self._rerun:
+                    self._thread = None
+                    return
+                self._rerun = False
+                self._progress = {'done': 0, 'total': 0}
+
+    def _track_progress(self, done, total):
+        self._progress = {'done': done, 'total': total}
+        _print_reload_progress(done, total)
+
+    def _status_locked(self):
+        building = self._thread is not None and self._thread.is_alive()
+        gallery = self.gallery
+        return {
+            'state': 'building' if building else 'idle',
+            'queued_rebuild': self._rerun,
+            'progress': dict(self._progress),
+            'version': self.version,
+            'total_encodings': len(gallery),
+            'known_students': gallery.student_count(),
+            'last_build': dict(self._last_build),
+        }
+
+    def status(self):
+        with self._lock:
+            return self._status_locked()
+
+
+face_db = FaceDatabase()
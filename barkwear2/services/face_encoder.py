@@ -0,0 +1,72 @@
+"""
+Enrollment-photo face encoding, serially or across a process pool
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from barkwear2.services.embedding_backends import get_embedding_backend
+
+
+def encode_photo(photo_path):
+    """Decode one photo and return its first face encoding (None if no face)"""
+    backend = get_embedding_backend()
+    img = backend.load_image(photo_path)
+    encodings = backend.embed(img)
+    return encodings[0] if encodings else None
+
+
+def _encode_photo_safe(photo_path):
+    # Runs in the worker process — never let one bad file kill the pool
+    try:
+        return photo_path, encode_photo(photo_path), None
+    except Exception as e:
+        return photo_path, None, str(e)
+
+
+def encode_photos(photo_paths, workers=1, progress=None):
+    """
+    Encode many photos, spreading decode + encode across `workers` processes
+
+    Every photo goes through the same encode_photo() as the serial path, so
+    the results are identical whatever the worker count.
+
+    Args:
+        photo_paths: List of image paths
+        workers: Process count; 1 (or a single photo) runs in-process
+        progress: Optional callable(done, total) invoked after each photo
+
+    Returns:
+        dict: {photo_path: encoding or None}. Photos that failed to decode
+        are left out (and reported), matching the old per-photo try/except.
+    """
+    photo_paths = list(photo_paths)
+    total = len(photo_paths)
+    results = {}
+    if total == 0:
+        return results
+
+    workers = max(1, min(workers or 1, total, os.cpu_count() or 1))
+
+    def collect(outcomes):
+        for done, (photo_path, encoding, error) in enumerate(outcomes, start=1):
+            if error is None:
+                results[photo_path] = encoding
+            else:
+                print(f"⚠️ Could not encode {photo_path}: {error}")
+            if progress:
+                progress(done, total)
+
+    if workers == 1:
+        collect(map(_encode_photo_safe, photo_paths))
+    else:
+        chunksize = max(1, total // (workers * 8))
+        # spawn, not fork: the Flask server is threaded and torch is loaded.
+        # Spawned workers re-import the main module (backend/app.py) as
+        # __mp_main__, so it must not build models at import time — they
+        # load through the model registry on first use / at server start
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            collect(pool.map(_encode_photo_safe, photo_paths, chunksize=chunksize))
+
+    return results
@@ -0,0 +1,223 @@
+"""
+Face gallery kept as one contiguous float32 (or int8 quantized) matrix
+Matching all detected faces against every known encoding is a single NumPy operation
+"""
+import numpy as np
+
+from barkwear2.services.quantization import dequantize_rows, quantize_rows, quantized_dot, quantized_norms_sq
+
+ENCODING_DIM = 128  # dlib face_recognition encodings (default width of an empty gallery)
+
+
+class FaceGallery:
+    """
+    Row i of `encodings` belongs to student_ids[i] / names[i].
+    Squared norms are precomputed so the distance matrix only needs one matmul.
+
+    With dtype 'int8' (per-row scale) only the quantized rows are
+    kept and distances are computed on them directly; `encodings` then
+    returns a dequantized copy, for edits and benchmarks.
+    """
+
+    def __init__(self, encodings, student_ids, names, dtype='float32'):
+        encodings = np.asarray(encodings, dtype=np.float32)
+        if encodings.size == 0:
+            dim = encodings.shape[-1] if encodings.ndim == 2 else ENCODING_DIM
+            encodings = np.zeros((0, dim), dtype=np.float32)
+        encodings = encodings.reshape(len(encodings), encodings.shape[-1])
+        self.dtype = dtype
+        self.codes, self.scales = quantize_rows(encodings, dtype)
+        self.norms_sq = quantized_norms_sq(self.codes, self.scales)
+        self.student_ids = np.asarray(student_ids, dtype=object)
+        self.names = np.asarray(names, dtype=object)
+
+    @classmethod
+    def _from_codes(cls, codes, scales, norms_sq, student_ids, names, dtype):
+        # Slicing / concatenating already-quantized rows, no re-quantization
+        gallery = cls.__new__(cls)
+        gallery.dtype = dtype
+        gallery.codes, gallery.scales, gallery.norms_sq = codes, scales, norms_sq
+        gallery.student_ids = np.asarray(student_ids, dtype=object)
+        gallery.names = np.asarray(names, dtype=object)
+        return gallery
+
+    @classmethod
+    def empty(cls, dim=ENCODING_DIM, dtype='float32'):
+        return cls(np.zeros((0, dim), dtype=np.float32), [], [], dtype=dtype)
+
+    @classmethod
+    def from_entries(cls, entries):
+        """Build from a list of {'student_id', 'name', 'encoding'} dicts"""
+        return cls(
+            [e['encoding'] for e in entries],
+            [e['student_id'] for e in entries],
+            [e['name'] for e in entries],
+        )
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def encodings(self):
+        """(N, D) float32 rows (a dequantized copy when quantized)"""
+        return dequantize_rows(self.codes, self.scales)
+
+    @property
+    def dim(self):
+        return self.codes.shape[1]
+
+    @property
+    def nbytes(self):
+        """Memory held by the matrix (codes plus per-row scales)"""
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def _take(self, rows):
+        return FaceGallery._from_codes(
+            self.codes[rows],
+            None if self.scales is None else self.scales[rows],
+            self.norms_sq[rows],
+            self.student_ids[rows],
+            self.names[rows],
+            self.dtype,
+        )
+
+    def quantized(self, dtype):
+        """Same rows stored as 'float32' or 'int8'"""
+        if dtype == self.dtype:
+            return self
+        return FaceGallery(self.encodings, self.student_ids, self.names, dtype=dtype)
+
+    def student_count(self):
+        return len(set(self.student_ids))
+
+    def entries(self):
+        """(student_id, name) per row, for listing endpoints"""
+        return list(zip(self.student_ids, self.names))
+
+    def subset(self, student_ids):
+        """New gallery holding only the rows of the given students"""
+        wanted = set(student_ids)
+        mask = np.fromiter((sid in wanted for sid in self.student_ids), dtype=bool, count=len(self))
+        return self._take(mask)
+
+    def without_student(self, student_id):
+        """New gallery with every row of one student removed"""
+        return self._take(self.student_ids != student_id)
+
+    def with_student(self, student_id, name, encodings):
+        """New gallery with one student's rows replaced by `encodings`"""
+        base = self.without_student(student_id)
+        encodings = np.asarray(encodings, dtype=np.float32)
+        if len(base) == 0 and encodings.size:
+            # First student decides the width (128 for dlib, 512 for Facenet512)
+            base = FaceGallery.empty(encodings.shape[-1], dtype=self.dtype)
+        added = FaceGallery(encodings.reshape(-1, base.dim), [student_id] * (encodings.size // base.dim),
+                            [name] * (encodings.size // base.dim), dtype=self.dtype)
+        return FaceGallery._from_codes(
+            np.concatenate([base.codes, added.codes]),
+            None if base.scales is None else np.concatenate([base.scales, added.scales]),
+            np.concatenate([base.norms_sq, added.norms_sq]),
+            list(base.student_ids) + list(added.student_ids),
+            list(base.names) + list(added.names),
+            self.dtype,
+        )
+
+    def renamed(self, student_id, name):
+        """New gallery showing a different display name for one student"""
+        names = self.names.copy()
+        names[self.student_ids == student_id] = name
+        return FaceGallery._from_codes(self.codes, self.scales, self.norms_sq, self.student_ids, names, self.dtype)
+
+    def compacted(self, diversity):
+        """
+        New gallery with each student's templates reduced to their centroid
+        plus any template at least `diversity` away from everything kept so
+        far (e.g. a photo with glasses or a very different angle)
+        """
+        encodings, student_ids, names = [], [], []
+        order = {}
+        for row, sid in enumerate(self.student_ids):
+            order.setdefault(sid, []).append(row)
+
+        rows_f32 = self.encodings
+        for sid, rows in order.items():
+            for template in compact_student_templates(rows_f32[rows], diversity):
+                encodings.append(template)
+                student_ids.append(sid)
+                names.append(self.names[rows[0]])
+        if not encodings:
+            return FaceGallery.empty(self.dim, dtype=self.dtype)
+        return FaceGallery(np.stack(encodings), student_ids, names, dtype=self.dtype)
+
+    def distances(self, face_encodings):
+        """
+        Euclidean distance of every query encoding to every gallery row
+
+        Args:
+            face_encodings: (F, D) array-like of query encodings
+
+        Returns:
+            (F, N) float32 distance matrix
+        """
+        queries = np.asarray(face_encodings, dtype=np.float32).reshape(-1, self.dim)
+        q_norms_sq = np.einsum('ij,ij->i', queries, queries)
+        d2 = q_norms_sq[:, None] + self.norms_sq[None, :] - 2.0 * quantized_dot(queries, self.codes, self.scales)
+        np.maximum(d2, 0.0, out=d2)
+        return np.sqrt(d2, out=d2)
+
+    def best_matches(self, face_encodings):
+        """
+        Nearest gallery row for each query encoding
+
+        Returns:
+            (indices, distances) — one entry per query; empty if the gallery is empty
+        """
+        if len(self) == 0 or len(face_encodings) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        dist = self.distances(face_encodings)
+        idx = np.argmin(dist, axis=1)
+        return idx, dist[np.arange(len(idx)), idx]
+
+    def match(self, face_encodings):
+        """(student_id, name, distance) of the nearest row for each query encoding"""
+        indices, distances = self.best_matches(face_encodings)
+        return [(self.student_ids[i], self.names[i], float(d)) for i, d in zip(indices, distances)]
+
+
+def compact_student_templates(templates, diversity):
+    """
+    Centroid of one student's encodings plus the truly different ones
+
+    Templates are visited farthest-from-centroid first and kept only if no
+    kept template is within `diversity`.
+    """
+    templates = np.asarray(templates, dtype=np.float32)
+    if len(templates) <= 1:
+        return list(templates)
+
+    centroid = templates.mean(axis=0)
+    kept = [centroid]
+    spread = np.linalg.norm(templates - centroid, axis=1)
+    for i in np.argsort(-spread):
+        if np.min(np.linalg.norm(np.asarray(kept) - templates[i], axis=1)) >= diversity:
+            kept.append(templates[i])
+    # Never grow the gallery: if every photo is distinct, the centroid adds nothing
+    return kept if len(kept) <= len(templates) else list(templates)
+
+
+def match_with_fallback(primary, fallback, face_encodings, threshold):
+    """
+    Match against `primary` first; faces with no match under `threshold`
+    there (or an empty primary) are retried against `fallback`.
+
+    Returns:
+        One (student_id, name, distance) per query encoding, or None where
+        neither gallery had any rows
+    """
+    matches = primary.match(face_encodings) if len(primary) else [None] * len(face_encodings)
+    retry = [i for i, m in enumerate(matches) if m is None or m[2] >= threshold]
+    if retry and fallback is not None and fallback is not primary:
+        for i, m in zip(retry, fallback.match([face_encodings[i] for i in retry])):
+            if matches[i] is None or m[2] < matches[i][2]:
+                matches[i] = m
+    return matches
@@ -0,0 +1,340 @@
+"""
+Nearest-neighbour indexes for face embeddings
+Exact brute-force search and an approximate IVF (inverted file) search, both pure NumPy
+"""
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from barkwear2.services.quantization import dequantize_rows, quantize_rows, quantized_dot, quantized_norms_sq
+
+METRICS = ('cosine', 'euclidean', 'euclidean_l2')
+
+
+class _VectorStore:
+    """
+    Growable matrix with a key per row; delete swaps the last row in
+    Rows are float32, or int8 with a float32 scale per row
+    """
+
+    def __init__(self, dim, capacity=64, dtype='float32'):
+        self.dim = dim
+        self.dtype = dtype
+        self.vectors = np.zeros((capacity, dim), dtype=np.dtype(dtype))
+        self.scales = np.ones(capacity, dtype=np.float32) if dtype == 'int8' else None
+        self.norms_sq = np.zeros(capacity, dtype=np.float32)
+        self.keys = []
+        self.rows = {}  # {key: row}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, key, vector):
+        if key in self.rows:
+            row = self.rows[key]
+        else:
+            row = len(self.keys)
+            if row == len(self.vectors):
+                self._grow(2 * row)
+            self.keys.append(key)
+            self.rows[key] = row
+        codes, scales = quantize_rows(vector[None, :], self.dtype)
+        self.vectors[row] = codes[0]
+        if scales is not None:
+            self.scales[row] = scales[0]
+        self.norms_sq[row] = quantized_norms_sq(codes, scales)[0]
+
+    def remove(self, key):
+        row = self.rows.pop(key)
+        last = len(self.keys) - 1
+        if row != last:
+            last_key = self.keys[last]
+            self.vectors[row] = self.vectors[last]
+            self.norms_sq[row] = self.norms_sq[last]
+            if self.scales is not None:
+                self.scales[row] = self.scales[last]
+            self.keys[row] = last_key
+            self.rows[last_key] = row
+        self.keys.pop()
+
+    def dots(self, query):
+        """query · every stored row, computed on the (quantized) rows"""
+        n = len(self.keys)
+        scales = None if self.scales is None else self.scales[:n]
+        return quantized_dot(query[None, :], self.vectors[:n], scales)[0]
+
+    def floats(self):
+        """float32 copy of the stored rows (for training)"""
+        n = len(self.keys)
+        return dequantize_rows(self.vectors[:n], None if self.scales is None else self.scales[:n])
+
+    @property
+    def nbytes(self):
+        n = len(self.keys)
+        return n * (self.vectors.itemsize * self.dim + (4 if self.scales is not None else 0))
+
+    def _grow(self, capacity):
+        vectors = np.zeros((capacity, self.dim), dtype=self.vectors.dtype)
+        norms_sq = np.zeros(capacity, dtype=np.float32)
+        n = len(self.keys)
+        vectors[:n] = self.vectors[:n]
+        norms_sq[:n] = self.norms_sq[:n]
+        if self.scales is not None:
+            scales = np.ones(capacity, dtype=np.float32)
+            scales[:n] = self.scales[:n]
+            self.scales = scales
+        self.vectors, self.norms_sq = vectors, norms_sq
+
+
+class FaceIndex(ABC):
+    """
+    Base class: key -> embedding, searched by one of the DeepFace metrics
+
+    For cosine and euclidean_l2 the vectors are L2-normalised on insert, so
+    search reduces to a dot product against the stored matrix.
+
+    With dtype 'int8' the stored matrix is quantized. If
+    `exact_lookup(key)` can return the original float vector (e.g. from the
+    memory-mapped EmbeddingStore), the best `rerank` candidates are re-scored
+    with it so the final ranking and distances are exact.
+    """
+
+    def __init__(self, dim, metric='cosine', dtype='float32', rerank=0, exact_lookup=None):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric '{metric}', expected one of {METRICS}")
+        self.dim = dim
+        self.metric = metric
+        self.dtype = dtype
+        self.rerank = rerank if dtype != 'float32' and exact_lookup is not None else 0
+        self.exact_lookup = exact_lookup
+
+    def _prepare(self, vector):
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        if vector.shape[0] != self.dim:
+            raise ValueError(f"Expected a {self.dim}-d embedding, got {vector.shape[0]}-d")
+        if self.metric != 'euclidean':
+            norm = np.linalg.norm(vector)
+            if norm > 0:
+                vector = vector / norm
+        return vector
+
+    def _distances(self, query, dots, norms_sq):
+        if self.metric == 'cosine':
+            return 1.0 - dots
+        if self.metric == 'euclidean_l2':
+            return np.sqrt(np.maximum(2.0 - 2.0 * dots, 0.0))
+        return np.sqrt(np.maximum(query @ query + norms_sq - 2.0 * dots, 0.0))
+
+    def _search_k(self, k):
+        return max(k, self.rerank)
+
+    def _rescore(self, query, keys, distances, k):
+        """Top k (key, distance); re-ranked on float32 vectors when enabled"""
+        top = self._top_k(distances, self._search_k(k))
+        if not self.rerank:
+            return [(keys[i], float(distances[i])) for i in top[:k]]
+        candidates = [keys[i] for i in top]
+        exact = np.stack([self._prepare(self.exact_lookup(key)) for key in candidates])
+        exact_dist = self._distances(query, exact @ query, np.einsum('ij,ij->i', exact, exact))
+        return [(candidates[i], float(exact_dist[i])) for i in self._top_k(exact_dist, k)]
+
+    @staticmethod
+    def _top_k(distances, k):
+        k = min(k, len(distances))
+        if k == 0:
+            return np.zeros(0, dtype=np.int64)
+        idx = np.argpartition(distances, k - 1)[:k] if k < len(distances) else np.arange(len(distances))
+        return idx[np.argsort(distances[idx])]
+
+    @abstractmethod
+    def add(self, key, vector):
+        """Insert or replace the embedding stored under key"""
+
+    @abstractmethod
+    def remove(self, key):
+        """Drop key (no error if it is absent)"""
+
+    @abstractmethod
+    def search(self, vector, k=1):
+        """Return up to k (key, distance) pairs, nearest first"""
+
+    @abstractmethod
+    def __len__(self):
+        pass
+
+    @abstractmethod
+    def __contains__(self, key):
+        pass
+
+
+class BruteForceIndex(FaceIndex):
+    """Exact search: one matrix-vector product over every stored embedding"""
+
+    def __init__(self, dim, metric='cosine', dtype='float32', rerank=0, exact_lookup=None):
+        super().__init__(dim, metric, dtype, rerank, exact_lookup)
+        self._store = _VectorStore(dim, dtype=dtype)
+
+    def add(self, key, vector):
+        self._store.add(key, self._prepare(vector))
+
+    def remove(self, key):
+        if key in self._store.rows:
+            self._store.remove(key)
+
+    def search(self, vector, k=1):
+        if len(self._store) == 0:
+            return []
+        query = self._prepare(vector)
+        distances = self._distances(query, self._store.dots(query), self._store.norms_sq[:len(self._store)])
+        return self._rescore(query, self._store.keys, distances, k)
+
+    @property
+    def nbytes(self):
+        return self._store.nbytes
+
+    def __len__(self):
+        return len(self._store)
+
+    def __contains__(self, key):
+        return key in self._store.rows
+
+
+class IVFIndex(FaceIndex):
+    """
+    Approximate search over k-means partitions (inverted file)
+
+    Embeddings are bucketed by their nearest of `nlist` centroids and a query
+    only scans the `nprobe` closest buckets. Until `min_train_size` vectors
+    have been added the index stays un-trained and scans everything, so small
+    galleries get exact results. Inserts and deletes after training go
+    straight into / out of their bucket; call train() again if the data
+    drifts a lot.
+    """
+
+    def __init__(self, dim, metric='cosine', nlist=256, nprobe=8, min_train_size=None, seed=0,
+                 dtype='float32', rerank=0, exact_lookup=None):
+        super().__init__(dim, metric, dtype, rerank, exact_lookup)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size or nlist * 16
+        self._rng = np.random.default_rng(seed)
+        self.centroids = None
+        self._lists = [_VectorStore(dim, dtype=dtype)]  # a single bucket until trained
+        self._where = {}  # {key: list number}
+
+    @property
+    def is_trained(self):
+        return self.centroids is not None
+
+    def _assign(self, vectors):
+        # Nearest centroid by squared euclidean distance (== max dot for normalised data)
+        c_norms = np.einsum('ij,ij->i', self.centroids, self.centroids)
+        return np.argmin(c_norms[None, :] - 2.0 * (vectors @ self.centroids.T), axis=1)
+
+    def add(self, key, vector):
+        vector = self._prepare(vector)
+        if key in self._where:
+            self.remove(key)
+        list_no = int(self._assign(vector[None, :])[0]) if self.is_trained else 0
+        self._lists[list_no].add(key, vector)
+        self._where[key] = list_no
+        if not self.is_trained and len(self._where) >= self.min_train_size:
+            self.train()
+
+    def remove(self, key):
+        list_no = self._where.pop(key, None)
+        if list_no is not None:
+            self._lists[list_no].remove(key)
+
+    def train(self, iterations=15, sample_size=None):
+        """(Re)build the centroids with k-means and re-bucket every vector"""
+        keys, vectors = [], []
+        for store in self._lists:
+            keys.extend(store.keys)
+            vectors.append(store.floats())
+        if not keys:
+            return
+        data = np.concatenate(vectors)
+        nlist = min(self.nlist, len(data))
+
+        sample_size = sample_size or nlist * 64
+        sample = data if len(data) <= sample_size else data[self._rng.choice(len(data), sample_size, replace=False)]
+        centroids = sample[self._rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            self.centroids = centroids
+            labels = self._assign(sample)
+            counts = np.bincount(labels, minlength=nlist)
+            sums = np.zeros_like(centroids)
+            order = np.argsort(labels, kind='stable')
+            sorted_labels = labels[order]
+            starts = np.flatnonzero(np.r_[True, sorted_labels[1:] != sorted_labels[:-1]])
+            sums[sorted_labels[starts]] = np.add.reduceat(sample[order], starts, axis=0)
+            empty = counts == 0
+            centroids = sums / np.maximum(counts, 1)[:, None]
+            # Re-seed empty clusters from random points
+            if empty.any():
+                centroids[empty] = sample[self._rng.choice(len(sample), int(empty.sum()), replace=False)]
+            if self.metric != 'euclidean':
+                centroids /= np.maximum(np.linalg.norm(centroids, axis=1, keepdims=True), 1e-12)
+        self.centroids = centroids.astype(np.float32)
+
+        self._lists = [_VectorStore(self.dim, capacity=16, dtype=self.dtype) for _ in range(nlist)]
+        self._where = {}
+        for key, vector, list_no in zip(keys, data, self._assign(data)):
+            self._lists[int(list_no)].add(key, vector)
+            self._where[key] = int(list_no)
+
+    def search(self, vector, k=1, nprobe=None):
+        if not self._where:
+            return []
+        query = self._prepare(vector)
+        if self.is_trained:
+            c_dist = np.einsum('ij,ij->i', self.centroids, self.centroids) - 2.0 * (self.centroids @ query)
+            probe = self._top_k(c_dist, nprobe or self.nprobe)
+        else:
+            probe = [0]
+
+        keys, dots, norms_sq = [], [], []
+        for list_no in probe:
+            store = self._lists[int(list_no)]
+            if len(store) == 0:
+                continue
+            keys.extend(store.keys)
+            dots.append(store.dots(query))
+            norms_sq.append(store.norms_sq[:len(store)])
+        if not keys:
+            return []
+
+        distances = self._distances(query, np.concatenate(dots), np.concatenate(norms_sq))
+        return self._rescore(query, keys, distances, k)
+
+    @property
+    def nbytes(self):
+        return sum(store.nbytes for store in self._lists)
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, key):
+        return key in self._where
+
+
+def create_face_index(backend, dim, metric='cosine', nlist=256, nprobe=8, dtype='float32', rerank=0,
+                      exact_lookup=None):
+    """
+    Build an index by name
+
+    Args:
+        backend: 'exact' (brute force) or 'ivf' (approximate)
+        dim: Embedding dimension
+        metric: 'cosine', 'euclidean' or 'euclidean_l2'
+        nlist, nprobe: IVF partition count and partitions scanned per query
+        dtype: Stored precision: 'float32' or 'int8'
+        rerank, exact_lookup: Re-score this many quantized candidates with exact_lookup(key)
+    """
+    quantization = {'dtype': dtype, 'rerank': rerank, 'exact_lookup': exact_lookup}
+    if backend == 'exact':
+        return BruteForceIndex(dim, metric, **quantization)
+    if backend == 'ivf':
+        return IVFIndex(dim, metric, nlist=nlist, nprobe=nprobe, **quantization)
+    raise ValueError(f"Unknown face index backend '{backend}', expected 'exact' or 'ivf'")
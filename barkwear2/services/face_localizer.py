@@ -0,0 +1,117 @@
+"""
+Face localization for enrollment capture (/detect-face)
+Coarse detection on a small frame, then high-upsample HOG only inside a padded ROI
+"""
+import threading
+
+import cv2
+
+from barkwear2.services.session_cache import TTLCache
+
+
+def scale_boxes(boxes, factor, offset=(0, 0)):
+    """Map (top, right, bottom, left) boxes by 1/factor, then shift by (dy, dx)"""
+    dy, dx = offset
+    return [
+        (int(top / factor) + dy, int(right / factor) + dx, int(bottom / factor) + dy, int(left / factor) + dx)
+        for (top, right, bottom, left) in boxes
+    ]
+
+
+def padded_roi(box, shape, padding):
+    """(top, right, bottom, left) box grown by `padding` x its size on each side, clipped to the image"""
+    top, right, bottom, left = box
+    pad_y = int((bottom - top) * padding)
+    pad_x = int((right - left) * padding)
+    height, width = shape[:2]
+    return (max(0, top - pad_y), min(width, right + pad_x), min(height, bottom + pad_y), max(0, left - pad_x))
+
+
+def box_area(box):
+    top, right, bottom, left = box
+    return (right - left) * (bottom - top)
+
+
+class CaptureFaceLocalizer:
+    """
+    The full search is the original /detect-face one: enlarge the frame
+    `enlarge`x and run HOG with the requested upsample. In coarse-to-fine
+    mode a cheap pass (frame shrunk to `coarse_max_side`, upsample 1) finds
+    roughly where the face is and the full search only runs on a padded ROI
+    around the largest coarse hit, so the box comes from the same detector
+    at the same scale. Full-frame search is the fallback when either pass
+    finds nothing.
+
+    With a capture session key, the last box found for that session is
+    searched first (the student stands roughly still between captures);
+    sessions expire through a TTL/LRU cache.
+    """
+
+    def __init__(self, detect, enlarge=2.0, coarse_to_fine=True, coarse_max_side=320, roi_padding=0.5,
+                 max_sessions=32, session_ttl=120.0):
+        self.detect = detect  # callable(rgb, upsample) -> boxes, e.g. EmbeddingBackend.detect
+        self.enlarge = enlarge
+        self.coarse_to_fine = coarse_to_fine
+        self.coarse_max_side = coarse_max_side
+        self.roi_padding = roi_padding
+        self._sessions = TTLCache(maxsize=max_sessions, ttl=session_ttl)  # {session: (last box, frame shape)}
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'session_roi': 0, 'refined': 0, 'full_frame': 0}
+
+    def _count(self, stage):
+        with self._lock:
+            self.stats['calls'] += 1
+            self.stats[stage] += 1
+
+    def detect_full(self, rgb, upsample, offset=(0, 0)):
+        """High-recall search: enlarge, HOG with `upsample`, map back"""
+        enlarged = cv2.resize(rgb, (int(rgb.shape[1] * self.enlarge), int(rgb.shape[0] * self.enlarge)))
+        return scale_boxes(self.detect(enlarged, upsample=upsample), self.enlarge, offset)
+
+    def detect_coarse(self, rgb):
+        """Fast, low-recall search on a shrunk frame"""
+        factor = min(1.0, self.coarse_max_side / max(rgb.shape[:2]))
+        small = cv2.resize(rgb, (int(rgb.shape[1] * factor), int(rgb.shape[0] * factor))) if factor < 1.0 else rgb
+        return scale_boxes(self.detect(small, upsample=1), factor)
+
+    def refine(self, rgb, box, upsample):
+        """Full search restricted to a padded ROI around `box`"""
+        top, right, bottom, left = padded_roi(box, rgb.shape, self.roi_padding)
+        if bottom <= top or right <= left:
+            return []
+        return self.detect_full(rgb[top:bottom, left:right], upsample, offset=(top, left))
+
+    def locate(self, rgb, upsample, session_key=None):
+        """
+        Face boxes in `rgb`, as (top, right, bottom, left)
+
+        Args:
+            rgb: RGB frame
+            upsample: HOG upsample for the full search (2 = fast, 3 = accurate)
+            session_key: Optional capture session; its last box is tried first
+        """
+        boxes = self._locate(rgb, upsample, session_key)
+        if session_key is not None:
+            if boxes:
+                self._sessions.set(session_key, (max(boxes, key=box_area), rgb.shape[:2]))
+            else:
+                self._sessions.pop(session_key)
+        return boxes
+
+    def _locate(self, rgb, upsample, session_key):
+        last = self._sessions.get(session_key) if session_key is not None else None
+        if last is not None and last[1] == rgb.shape[:2]:
+            boxes = self.refine(rgb, last[0], upsample)
+            if boxes:
+                self._count('session_roi')
+                return boxes
+
+        if self.coarse_to_fine:
+            coarse = self.detect_coarse(rgb)
+            if coarse:
+                refined = self.refine(rgb, max(coarse, key=box_area), upsample)
+                if refined:
+                    self._count('refined')
+                    return refined
+        self._count('full_frame')
+        return self.detect_full(rgb, upsample)
@@ -2,127 +2,222 @@
 Face Recognition Service using DeepFace
 Much easier to install than dlib - no C++ compiler needed!
 """
-from deepface import DeepFace
 import numpy as np
 import os
-import pickle
-import cv2
+import threading
 from barkwear2.config import Config
+from barkwear2.services.embedding_backends import DeepFaceBackend
+from barkwear2.services.face_index import create_face_index
+from barkwear2.services.embedding_store import EmbeddingStore
+
+# Shared by every FaceRecognitionService and by delete_stored_encoding(),
+# which must work without building the model
+face_store = EmbeddingStore(
+    Config.FACE_ENCODINGS_FOLDER,
+    DeepFaceBackend.dim,  # Facenet512
+    compact_ratio=Config.FACE_STORE_COMPACT_RATIO
+)
+
+
+def _remove_legacy_encoding(student_id):
+    """Per-student .pkl from before the embedding store (imported on first load)"""
+    encoding_path = os.path.join(Config.FACE_ENCODINGS_FOLDER, f"{student_id}.pkl")
+    if os.path.exists(encoding_path):
+        os.remove(encoding_path)
+
+
+def delete_stored_encoding(student_id):
+    """
+    Remove a student's enrollment embedding from disk without building the
+    model, for when no FaceRecognitionService is loaded
+    
+    Returns:
+        bool: Whether the store held one
+    """
+    _remove_legacy_encoding(student_id)
+    face_store.open()  # pick up the current ID table
+    return face_store.delete(student_id)
+
 
 class FaceRecognitionService:
     def __init__(self):
-        self.known_faces = {}  # {student_id: face_embedding}
+        self.known_faces = {}  # {student_id: face_embedding} (views into the memory-mapped store)
         self.encodings_folder = Config.FACE_ENCODINGS_FOLDER
         self.model_name = "Facenet512"  # Options: VGG-Face, Facenet, Facenet512, ArcFace
         self.distance_metric = "cosine"  # Options: cosine, euclidean, euclidean_l2
         self.threshold = 0.4  # Lower = more strict (Facenet512 threshold)
+        # Raw (un-normalized) embeddings, arrays passed to DeepFace untouched as before
+        self.backend = DeepFaceBackend(self.model_name, detector_backend='opencv', channels='bgr', l2_normalize=False)
+        self.embedding_dim = self.backend.dim  # Facenet512 output size
+        self.index = create_face_index(
+            Config.FACE_INDEX_BACKEND,
+            self.embedding_dim,
+            metric=self.distance_metric,
+            nlist=Config.FACE_INDEX_NLIST,
+            nprobe=Config.FACE_INDEX_NPROBE,
+            dtype=Config.FACE_QUANTIZATION,
+            rerank=Config.FACE_RERANK_CANDIDATES,
+            exact_lookup=lambda student_id: self.store.get(student_id)  # float32 rows, memory-mapped
+        )
+        self.store = face_store
+        # Store + index updates and index searches: _VectorStore moves rows on remove,
+        # so a search must not run in the middle of one
+        self._gallery_lock = threading.Lock()
         self._load_all_encodings()
     
+    def warm_up(self):
+        """
+        Build Facenet512 and run one dummy inference before the first enrollment
+        (the backend's model registry entry calls this; readiness is reported there)
+        """
+        self.backend.warm_up()
+    
     def _load_all_encodings(self):
-        """Load all saved face embeddings from disk"""
-        if not os.path.exists(self.encodings_folder):
-            os.makedirs(self.encodings_folder, exist_ok=True)
-            return
+        """Map the embedding store, importing legacy per-student .pkl files on first run"""
+        self.store.open()
+
+        if len(self.store) == 0 and any(f.endswith('.pkl') for f in os.listdir(self.encodings_folder)):
+            imported = self.store.import_pickles(self.encodings_folder)
+            print(f"📦 Imported {imported} legacy .pkl face encodings into {self.store.index_path}")
+
+        self._sync_from_store()
+        print(f"✅ Loaded {len(self.known_faces)} face encodings")
+
+    def _sync_from_store(self):
+        """Rebuild known_faces and the search index from the store"""
+        self.known_faces = dict(self.store.items())
+        for student_id, embedding in self.known_faces.items():
+            self.index.add(student_id, embedding)
+    
+    def _faces(self, image_array, faces=None):
+        """(box, embedding) per face; re-raises the error a batch hit for this image"""
+        if faces is None:
+            return self.backend.detect_and_embed(image_array)
+        if isinstance(faces, Exception):
+            raise faces
+        return faces
+    
+    def _embed_images(self, images):
+        """
+        Detect and embed a list of images in one batched forward pass
         
-        for filename in os.listdir(self.encodings_folder):
-            if filename.endswith('.pkl'):
-                student_id = filename.replace('.pkl', '')
-                encoding_path = os.path.join(self.encodings_folder, filename)
-                
+        Returns:
+            list: Per image, its (box, embedding) list or the exception it raised
+        """
+        try:
+            return self.backend.embed_batch(images)
+        except Exception:
+            # One bad image must not fail the others: redo them one by one
+            results = []
+            for image in images:
                 try:
-                    with open(encoding_path, 'rb') as f:
-                        embedding = pickle.load(f)
-                        self.known_faces[student_id] = embedding
+                    results.append(self.backend.detect_and_embed(image))
                 except Exception as e:
-                    print(f"Error loading encoding for {student_id}: {e}")
-        
-        print(f"✅ Loaded {len(self.known_faces)} face encodings")
+                    results.append(e)
+            return results
     
-    def save_face_encoding(self, student_id, image_array):
+    def save_face_encoding(self, student_id, image_array, faces=None):
         """
         Save face embedding for a student using DeepFace
         
         Args:
             student_id: Student ID
             image_array: NumPy array of the face image (RGB or BGR)
+            faces: Precomputed detection + embeddings for image_array (batch methods)
         
         Returns:
             dict: Success status and message
         """
+        return self._save([(student_id, image_array, faces)])[0]
+    
+    def _enrollment_embedding(self, image_array, faces=None):
+        """(embedding, None) for the single face in the image, or (None, failure result)"""
         try:
-            # DeepFace works with both RGB and BGR, handles it automatically
-            
-            # Detect and extract face embedding
-            result = DeepFace.represent(
-                img_path=image_array,
-                model_name=self.model_name,
-                enforce_detection=True,
-                detector_backend='opencv',  # Fast detector
-                align=True
-            )
-            
-            # DeepFace returns a list of face embeddings (one per face detected)
-            if len(result) == 0:
-                return {
-                    'success': False,
-                    'message': 'No face detected in image'
-                }
-            
-            if len(result) > 1:
-                return {
-                    'success': False,
-                    'message': 'Multiple faces detected. Please ensure only one face is visible.'
-                }
-            
-            # Get the face embedding (it's a list of floats)
-            face_embedding = np.array(result[0]['embedding'])
-            
-            # Save to disk
-            encoding_path = os.path.join(self.encodings_folder, f"{student_id}.pkl")
-            with open(encoding_path, 'wb') as f:
-                pickle.dump(face_embedding, f)
-            
-            # Add to memory
-            self.known_faces[student_id] = face_embedding
-            
-            return {
-                'success': True,
-                'message': 'Face encoding saved successfully',
-                'encoding_path': encoding_path
-            }
-        
+            # Detect, align and embed every face (one model call)
+            result = self._faces(image_array, faces)
         except ValueError as e:
             # DeepFace raises ValueError when no face detected
-            return {
+            return None, {
                 'success': False,
                 'message': f'No face detected: {str(e)}'
             }
-        
         except Exception as e:
-            return {
+            return None, {
                 'success': False,
                 'message': f'Error saving face encoding: {str(e)}'
             }
+        
+        # One (box, embedding) per face detected
+        if len(result) == 0:
+            return None, {
+                'success': False,
+                'message': 'No face detected in image'
+            }
+        
+        if len(result) > 1:
+            return None, {
+                'success': False,
+                'message': 'Multiple faces detected. Please ensure only one face is visible.'
+            }
+        
+        return np.array(result[0][1]), None
     
-    def recognize_face(self, image_array):
+    def _save(self, items):
+        """
+        Store every valid (student_id, image_array, faces) enrollment with one
+        write to the embedding store and one known_faces rebuild
+        
+        Returns:
+            list: One result dict per item, in order
+        """
+        results, embeddings, saved = [], {}, []
+        for student_id, image_array, faces in items:
+            face_embedding, failure = self._enrollment_embedding(image_array, faces)
+            results.append(failure)
+            if failure is None:
+                embeddings[student_id] = face_embedding  # a repeated ID keeps its last photo, as one-by-one did
+                saved.append(len(results) - 1)
+        
+        if embeddings:
+            with self._gallery_lock:
+                try:
+                    # Save to disk (appended to the shared embedding matrix, ID table rewritten once)
+                    self.store.add_many(embeddings)
+                except Exception as e:
+                    for i in saved:
+                        results[i] = {
+                            'success': False,
+                            'message': f'Error saving face encoding: {str(e)}'
+                        }
+                    return results
+                
+                # Add to memory (row views change when the store compacts, so refresh them all)
+                self.known_faces = dict(self.store.items())
+                for student_id, face_embedding in embeddings.items():
+                    self.index.add(student_id, face_embedding)
+        
+        for i in saved:
+            results[i] = {
+                'success': True,
+                'message': 'Face encoding saved successfully',
+                'encoding_path': self.store.index_path
+            }
+        return results
+    
+    def recognize_face(self, image_array, faces=None):
         """
         Recognize a face in the given image using DeepFace
         
         Args:
             image_array: NumPy array of the image (RGB or BGR)
+            faces: Precomputed detection + embeddings for image_array (batch methods)
         
         Returns:
             dict: Recognition results
         """
         try:
             # Extract face embedding from new image
-            result = DeepFace.represent(
-                img_path=image_array,
-                model_name=self.model_name,
-                enforce_detection=True,
-                detector_backend='opencv',
-                align=True
-            )
+            result = self._faces(image_array, faces)
             
             if len(result) == 0:
                 return {
@@ -131,11 +226,9 @@ class FaceRecognitionService:
                     'student_id': None
                 }
             
-            # Get face embedding
-            face_embedding = np.array(result[0]['embedding'])
-            
-            # Get face location for drawing box
-            face_location = result[0]['facial_area']  # {x, y, w, h}
+            # Face location for drawing box, already (top, right, bottom, left)
+            face_location, face_embedding = result[0]
+            face_embedding = np.array(face_embedding)
             
             if len(self.known_faces) == 0:
                 return {
@@ -144,22 +237,9 @@ class FaceRecognitionService:
                     'student_id': None
                 }
             
-            # Compare with all known faces
-            best_match_id = None
-            best_distance = float('inf')
-            
-            for student_id, known_embedding in self.known_faces.items():
-                # Calculate distance
-                if self.distance_metric == "cosine":
-                    distance = self._cosine_distance(face_embedding, known_embedding)
-                elif self.distance_metric == "euclidean":
-                    distance = self._euclidean_distance(face_embedding, known_embedding)
-                else:
-                    distance = self._euclidean_l2_distance(face_embedding, known_embedding)
-                
-                if distance < best_distance:
-                    best_distance = distance
-                    best_match_id = student_id
+            # Nearest known face from the index (exact or approximate, see Config)
+            with self._gallery_lock:
+                best_match_id, best_distance = self.index.search(face_embedding, k=1)[0]
             
             # Check if best match is below threshold
             if best_distance < self.threshold:
@@ -171,12 +251,7 @@ class FaceRecognitionService:
                     'student_id': best_match_id,
                     'confidence': float(confidence),
                     'distance': float(best_distance),
-                    'face_location': (
-                        face_location['y'],
-                        face_location['x'] + face_location['w'],
-                        face_location['y'] + face_location['h'],
-                        face_location['x']
-                    )  # Convert to (top, right, bottom, left) format
+                    'face_location': tuple(int(v) for v in face_location)
                 }
             else:
                 return {
@@ -217,17 +292,15 @@ class FaceRecognitionService:
     
     def delete_face_encoding(self, student_id):
         """Delete face encoding for a student"""
-        encoding_path = os.path.join(self.encodings_folder, f"{student_id}.pkl")
-        
-        if os.path.exists(encoding_path):
-            os.remove(encoding_path)
-        
-        if student_id in self.known_faces:
-            del self.known_faces[student_id]
+        _remove_legacy_encoding(student_id)
+        with self._gallery_lock:
+            self.store.delete(student_id)
+            self.index.remove(student_id)
+            self.known_faces = dict(self.store.items())
         
         return {'success': True, 'message': 'Face encoding deleted'}
     
-    def verify_face(self, student_id, image_array):
+    def verify_face(self, student_id, image_array, faces=None):
         """
         Verify if image matches a specific student (1:1 verification)
         Faster than recognition when you know the student ID
@@ -235,6 +308,7 @@ class FaceRecognitionService:
         Args:
             student_id: Known student ID
             image_array: Image to verify
+            faces: Precomputed detection + embeddings for image_array (batch methods)
         
         Returns:
             dict: Verification result
@@ -248,12 +322,7 @@ class FaceRecognitionService:
         
         try:
             # Get embedding from image
-            result = DeepFace.represent(
-                img_path=image_array,
-                model_name=self.model_name,
-                enforce_detection=True,
-                detector_backend='opencv'
-            )
+            result = self._faces(image_array, faces)
             
             if len(result) == 0:
                 return {
@@ -262,7 +331,7 @@ class FaceRecognitionService:
                     'message': 'No face detected'
                 }
             
-            face_embedding = np.array(result[0]['embedding'])
+            face_embedding = np.array(result[0][1])
             known_embedding = self.known_faces[student_id]
             
             # Calculate distance
@@ -283,4 +352,49 @@ class FaceRecognitionService:
                 'success': False,
                 'verified': False,
                 'message': f'Error during verification: {str(e)}'
-            }
\ No newline at end of file
+            }
+    
+    def save_face_encodings(self, items):
+        """
+        Enroll several students at once (bulk import)
+        
+        Args:
+            items: List of (student_id, image_array)
+        
+        Returns:
+            list: One save_face_encoding() result dict per item, in order
+        """
+        items = list(items)
+        all_faces = self._embed_images([image for _, image in items])
+        return self._save(
+            (student_id, image, faces) for (student_id, image), faces in zip(items, all_faces)
+        )
+    
+    def recognize_faces(self, images):
+        """
+        Recognize one face per image for a list of images (e.g. several cameras)
+        
+        Returns:
+            list: One recognize_face() result dict per image, in order
+        """
+        images = list(images)
+        return [
+            self.recognize_face(image, faces=faces)
+            for image, faces in zip(images, self._embed_images(images))
+        ]
+    
+    def verify_faces(self, items):
+        """
+        1:1 verification for several (student_id, image_array) pairs
+        
+        Returns:
+            list: One verify_face() result dict per pair, in order
+        """
+        items = list(items)
+        # Unknown students fail without costing a forward pass
+        known = [i for i, (student_id, _) in enumerate(items) if student_id in self.known_faces]
+        all_faces = dict(zip(known, self._embed_images([items[i][1] for i in known])))
+        return [
+            self.verify_face(student_id, image, faces=all_faces.get(i))
+            for i, (student_id, image) in enumerate(items)
+        ]
@@ -0,0 +1,149 @@
+"""
+Cross-frame face tracking for live recognition
+A student standing in front of the kiosk keeps their identity between frames
+without re-running the 128-d dlib encoding every second
+"""
+import threading
+
+import cv2
+import numpy as np
+
+from barkwear2.services.session_cache import TTLCache
+
+SIGNATURE_SIZE = 16  # Appearance signature is a 16x16 grayscale thumbnail
+
+
+def box_iou(a, b):
+    """IoU of two (top, right, bottom, left) boxes"""
+    top, bottom = max(a[0], b[0]), min(a[2], b[2])
+    left, right = max(a[3], b[3]), min(a[1], b[1])
+    inter = max(0, bottom - top) * max(0, right - left)
+    area_a = (a[2] - a[0]) * (a[1] - a[3])
+    area_b = (b[2] - b[0]) * (b[1] - b[3])
+    union = area_a + area_b - inter
+    return inter / union if union > 0 else 0.0
+
+
+def appearance_signature(rgb, box):
+    """Zero-mean, unit-norm grayscale thumbnail of the face box"""
+    top, right, bottom, left = box
+    crop = rgb[max(0, top):max(0, bottom), max(0, left):max(0, right)]
+    if crop.size == 0:
+        return None
+    gray = cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY)
+    thumb = cv2.resize(gray, (SIGNATURE_SIZE, SIGNATURE_SIZE), interpolation=cv2.INTER_AREA).astype(np.float32)
+    thumb -= thumb.mean()
+    norm = np.linalg.norm(thumb)
+    return (thumb / norm).ravel() if norm > 0 else None
+
+
+class _Track:
+    __slots__ = ('box', 'signature', 'match', 'frames_since_verify')
+
+    def __init__(self, box, signature, match):
+        self.box = box
+        self.signature = signature
+        self.match = match  # (student_id, name, distance) from the last real encoding, or None
+        self.frames_since_verify = 0
+
+
+class FaceTracker:
+    """
+    Per-session face tracks matched frame to frame by box IoU plus a cheap
+    appearance check. A face whose track is stable and already identified
+    reuses that identity; it is re-encoded every `reverify_every` frames, when
+    the box jumps (IoU below `min_iou`) or when its appearance changes.
+
+    Sessions (one per camera) live in a TTL/LRU cache so abandoned kiosks
+    don't accumulate state.
+    """
+
+    def __init__(self, min_iou=0.5, min_similarity=0.8, reverify_every=5, max_sessions=64, session_ttl=30.0):
+        self.min_iou = min_iou
+        self.min_similarity = min_similarity
+        self.reverify_every = reverify_every
+        self._sessions = TTLCache(maxsize=max_sessions, ttl=session_ttl)
+        self._lock = threading.Lock()
+        self.stats = {'faces': 0, 'reused': 0, 'encoded': 0}
+
+    def _pair_tracks(self, tracks, boxes):
+        """Greedy highest-IoU assignment of current boxes to previous tracks"""
+        pairs = sorted(
+            ((box_iou(track.box, box), t, b) for t, track in enumerate(tracks) for b, box in enumerate(boxes)),
+            reverse=True
+        )
+        assigned, used = {}, set()
+        for iou, t, b in pairs:
+            if iou < self.min_iou:
+                break
+            if b in assigned or t in used:
+                continue
+            assigned[b] = tracks[t]
+            used.add(t)
+        return assigned
+
+    def resolve(self, session_key, boxes, rgb, recognize, threshold, context=None):
+        """
+        Identities for this frame's face boxes
+
+        Args:
+            session_key: Camera / session identifier
+            boxes: Face boxes (top, right, bottom, left) in `rgb` coordinates
+            rgb: The RGB frame the boxes refer to
+            recognize: callable(list of box indices) -> list of (student_id, name, distance);
+                       does the real encoding + gallery match for those faces
+            threshold: Current match threshold; only tracks identified under it are reused
+            context: Anything identifying the gallery in use — tracks made against a
+                     different gallery are re-verified
+
+        Returns:
+            List of (student_id, name, distance) or None, one per box
+        """
+        with self._lock:
+            session = self._sessions.get(session_key)
+        if session is None or session['context'] is not context:
+            session = {'context': context, 'tracks': []}
+
+        previous = self._pair_tracks(session['tracks'], boxes)
+        signatures = [appearance_signature(rgb, box) for box in boxes]
+
+        results = [None] * len(boxes)
+        to_encode = []
+        for i, box in enumerate(boxes):
+            track = previous.get(i)
+            stable = (
+                track is not None
+                and track.match is not None
+                and track.match[2] < threshold
+                and track.frames_since_verify + 1 < self.reverify_every
+                and signatures[i] is not None
+                and track.signature is not None
+                and float(signatures[i] @ track.signature) >= self.min_similarity
+            )
+            if stable:
+                results[i] = track.match
+            else:
+                to_encode.append(i)
+
+        if to_encode:
+            for i, match in zip(to_encode, recognize(to_encode)):
+                results[i] = match
+
+        tracks = []
+        encoded = set(to_encode)
+        for i, box in enumerate(boxes):
+            track = previous.get(i)
+            if i in encoded or track is None:
+                track = _Track(box, signatures[i], results[i])
+            else:
+                track.box = box
+                track.frames_since_verify += 1
+            tracks.append(track)
+        session['tracks'] = tracks
+
+        with self._lock:
+            self._sessions.set(session_key, session)
+            self.stats['faces'] += len(boxes)
+            self.stats['encoded'] += len(to_encode)
+            self.stats['reused'] += len(boxes) - len(to_encode)
+        return results
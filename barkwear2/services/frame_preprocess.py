@@ -0,0 +1,125 @@
+"""
+Single-pass preprocessing of /detect frames
+JPEG decoded straight to BGR (at reduced scale when oversized), flipped in place, and the
+YOLO input and the small RGB face-detection input produced from that one buffer
+"""
+import base64
+import struct
+
+import cv2
+import numpy as np
+
+# libjpeg scales by 1/2, 1/4 or 1/8 during the IDCT, far cheaper than decoding full size and resizing
+REDUCED_DECODE = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+# Webcam frames carry no EXIF; ignore it so decoding matches the old PIL path
+DECODE_FLAGS = cv2.IMREAD_IGNORE_ORIENTATION
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def encoded_size(buf):
+    """(height, width) from a JPEG or PNG header without decoding, or None"""
+    if buf[:8] == b'\x89PNG\r\n\x1a\n' and len(buf) >= 24:
+        width, height = struct.unpack('>II', buf[16:24])
+        return height, width
+    if buf[:2] != b'\xff\xd8':
+        return None
+    i = 2
+    while i + 9 <= len(buf):
+        if buf[i] != 0xFF:
+            return None
+        marker = buf[i + 1]
+        if marker == 0xFF:  # fill byte
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:  # markers without a length
+            i += 2
+            continue
+        if marker in SOF_MARKERS:
+            height, width = struct.unpack('>HH', buf[i + 5:i + 9])
+            return height, width
+        i += 2 + struct.unpack('>H', buf[i + 2:i + 4])[0]
+    return None
+
+
+def decode_image(buf, max_side=None):
+    """
+    BGR image from encoded bytes
+
+    Args:
+        buf: JPEG / PNG bytes
+        max_side: When the image is larger, decode at the biggest 1/2, 1/4 or
+            1/8 reduction that still keeps its longest side >= max_side
+    """
+    data = np.frombuffer(buf, dtype=np.uint8)
+    flags = cv2.IMREAD_COLOR
+    size = encoded_size(buf) if max_side else None
+    if size is not None:
+        for factor, reduced in REDUCED_DECODE:
+            if max(size) // factor >= max_side:
+                flags = reduced
+                break
+    image = cv2.imdecode(data, flags | DECODE_FLAGS)
+    if image is None:
+        raise ValueError("Could not decode image data")
+    return image
+
+
+def fit(image, max_side, interpolation=cv2.INTER_LINEAR):
+    """`image` shrunk so its longest side is at most `max_side` (the same array if it already fits)"""
+    height, width = image.shape[:2]
+    if max(height, width) <= max_side:
+        return image
+    scale = max_side / max(height, width)
+    return cv2.resize(image, (int(width * scale), int(height * scale)), interpolation=interpolation)
+
+
+class Frame:
+    """
+    One decoded frame and the views each /detect stage needs
+
+    bgr is the YOLO input (longest side <= max_side, mirrored). rgb_small is
+    the face-detection input (longest side <= face_max_side), resized from
+    bgr and colour-converted in place. Full-resolution RGB, which only the
+    embedding step needs, is converted on first access, so frames without a
+    face never pay for it.
+    """
+
+    def __init__(self, bgr, face_max_side=320):
+        self.bgr = bgr
+        height, width = bgr.shape[:2]
+        self.face_scale = min(1.0, face_max_side / max(height, width))
+        if self.face_scale < 1.0:
+            small = cv2.resize(bgr, (int(width * self.face_scale), int(height * self.face_scale)))
+            self.rgb_small = cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=small)
+            self._rgb = None
+        else:
+            self._rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+            self.rgb_small = self._rgb
+
+    @property
+    def rgb(self):
+        if self._rgb is None:
+            self._rgb = cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB)
+        return self._rgb
+
+    @property
+    def shape(self):
+        return self.bgr.shape
+
+
+def decode_frame(base64_string, max_side=640, mirror=True, face_max_side=320):
+    """
+    Frame from a base64 (optionally data-URL) image
+
+    Args:
+        base64_string: Encoded frame as sent by the kiosk
+        max_side: Longest side of the YOLO input
+        mirror: Flip horizontally (in place, after shrinking)
+        face_max_side: Longest side of the face-detection input
+    """
+    if ',' in base64_string:
+        base64_string = base64_string.split(',', 1)[1]
+    bgr = fit(decode_image(base64.b64decode(base64_string), max_side), max_side)
+    if mirror:
+        cv2.flip(bgr, 1, dst=bgr)
+    return Frame(bgr, face_max_side)
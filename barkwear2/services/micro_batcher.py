@@ -0,0 +1,107 @@
+"""
+Micro-batching dispatcher for model inference shared by concurrent requests
+Frames arriving within a few milliseconds of each other go through one batched forward pass
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """
+    Request threads call submit(item) and block; one worker thread takes the
+    first waiting item, keeps collecting until `max_batch` items or
+    `max_wait_ms` after that first item, then calls `infer_batch(items)` once
+    and hands result i back to the caller of item i.
+
+    A lone request therefore waits at most `max_wait_ms` extra; under load the
+    wait is usually cut short by the batch filling up. A caller never waits
+    longer than `result_timeout` seconds for its result.
+    """
+
+    def __init__(self, infer_batch, max_batch=8, max_wait_ms=5.0, name='micro-batcher', result_timeout=30.0):
+        self.infer_batch = infer_batch  # callable(list of items) -> list of results, same order
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self.result_timeout = result_timeout
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._batch_sizes = {}  # {batch size: count}
+        self._stats = {'batches': 0, 'items': 0, 'errors': 0, 'queue_ms_total': 0.0, 'queue_ms_max': 0.0,
+                       'infer_ms_total': 0.0}
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, item, timeout=None):
+        """
+        Queue one item and wait for its result (re-raises the batch's exception)
+
+        Raises concurrent.futures.TimeoutError after `timeout` seconds
+        (default: result_timeout).
+        """
+        future = Future()
+        self._queue.put((item, future, time.perf_counter()))
+        return future.result(timeout=self.result_timeout if timeout is None else timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            waits = [(started - queued) * 1000 for _, _, queued in batch]
+            try:
+                results = list(self.infer_batch([item for item, _, _ in batch]))
+                if len(results) != len(batch):
+                    # zip() would leave the extra callers waiting forever
+                    raise RuntimeError(f"infer_batch returned {len(results)} result(s) for {len(batch)} item(s)")
+                for (_, future, _), result in zip(batch, results):
+                    future.set_result(result)
+                error = False
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                error = True
+            self._record(len(batch), waits, (time.perf_counter() - started) * 1000, error)
+
+    def _record(self, size, waits, infer_ms, error):
+        with self._lock:
+            self._batch_sizes[size] = self._batch_sizes.get(size, 0) + 1
+            self._stats['batches'] += 1
+            self._stats['items'] += size
+            self._stats['errors'] += error
+            self._stats['queue_ms_total'] += sum(waits)
+            self._stats['queue_ms_max'] = max(self._stats['queue_ms_max'], max(waits))
+            self._stats['infer_ms_total'] += infer_ms
+
+    def stats(self):
+        """Batch-size histogram and queue / inference timings, for /health"""
+        with self._lock:
+            s = dict(self._stats)
+            sizes = dict(sorted(self._batch_sizes.items()))
+        batches, items = s['batches'], s['items']
+        return {
+            'max_batch': self.max_batch,
+            'max_wait_ms': self.max_wait * 1000,
+            'batches': batches,
+            'items': items,
+            'errors': s['errors'],
+            'mean_batch_size': round(items / batches, 2) if batches else 0,
+            'batch_sizes': sizes,
+            'mean_queue_ms': round(s['queue_ms_total'] / items, 2) if items else 0,
+            'max_queue_ms': round(s['queue_ms_max'], 2),
+            'mean_infer_ms': round(s['infer_ms_total'] / batches, 2) if batches else 0,
+            'queued_now': self._queue.qsize(),
+        }
@@ -0,0 +1,121 @@
+"""
+Model registry: lazy / background loading and warm-up of the backend's models
+Importing the app never builds YOLO or Facenet512; they load on first use or in a warm-up started by the server
+"""
+import threading
+import time
+
+
+class _Entry:
+    def __init__(self, name, loader, warm_up, priority):
+        self.name = name
+        self.loader = loader    # () -> model
+        self.warm_up = warm_up  # (model) -> None, one dummy inference
+        self.priority = priority
+        self.model = None
+        self.error = None
+        self.load_seconds = None
+        self.loading = False
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """
+    Models are registered with a loader and an optional warm-up (a dummy
+    inference so the first real frame does not pay for lazy allocations).
+    get(name) loads and warms the model on first use; requests arriving while
+    a warm-up thread is loading it wait for that load instead of starting a
+    second one. A failed load is retried on the next get().
+
+    warm_up() loads models by ascending `priority` (ties in registration
+    order), so the ones on the hot path can be made ready first.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def register(self, name, loader, warm_up=None, priority=100):
+        self._entries[name] = _Entry(name, loader, warm_up, priority)
+
+    def get(self, name):
+        """The loaded model, loading and warming it up first if needed"""
+        entry = self._entries[name]
+        if entry.model is not None:
+            return entry.model
+        with entry.lock:
+            if entry.model is None:
+                self._load(entry)
+            return entry.model
+
+    def _load(self, entry):
+        entry.loading = True
+        started = time.time()
+        try:
+            model = entry.loader()
+            if entry.warm_up is not None:
+                entry.warm_up(model)
+            entry.load_seconds = round(time.time() - started, 2)
+            entry.error = None
+            entry.model = model
+            print(f"✅ {entry.name} ready ({entry.load_seconds}s)")
+        except Exception as e:
+            entry.error = str(e)
+            print(f"⚠️ {entry.name} failed to load: {e}")
+            raise
+        finally:
+            entry.loading = False
+
+    def if_loaded(self, name, use, otherwise):
+        """
+        use(model) if the model is loaded, else otherwise() without loading it
+
+        A load in progress is waited for, and no load starts while otherwise()
+        runs, so it can safely change what the loader would read.
+        """
+        entry = self._entries[name]
+        with entry.lock:
+            if entry.model is not None:
+                return use(entry.model)
+            return otherwise()
+
+    def is_ready(self, name):
+        return self._entries[name].model is not None
+
+    def warm_up(self, mode='background', names=None):
+        """
+        Load registered models ahead of the first request
+
+        Args:
+            mode: 'background' (one thread, returns at once), 'blocking' or 'lazy' (first use)
+            names: Models to load, in order (default: all, by priority)
+        """
+        if mode == 'lazy':
+            return
+        names = list(names or sorted(self._entries, key=lambda name: self._entries[name].priority))
+
+        def load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception:
+                    pass  # recorded in status(); get() retries on first use
+
+        if mode == 'background':
+            threading.Thread(target=load_all, name='model-warmup', daemon=True).start()
+        else:
+            load_all()
+
+    def status(self):
+        """Readiness of every registered model, for /health"""
+        return {
+            name: {
+                'ready': entry.model is not None,
+                'loading': entry.loading,
+                'load_seconds': entry.load_seconds,
+                'error': entry.error,
+            }
+            for name, entry in self._entries.items()
+        }
+
+
+model_registry = ModelRegistry()
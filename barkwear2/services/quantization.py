@@ -0,0 +1,86 @@
+"""
+Scalar quantization of embedding matrices (int8 with a per-vector scale)
+Distances are computed on the quantized rows in bounded chunks, never on a full float32 copy
+"""
+import numpy as np
+
+# float16 is not offered: NumPy widens it to float32 element by element, so a
+# float16 scan ran about 10x slower than float32 (21.3 ms vs 2.0 ms per query
+# on a 20k x 512 index) for half the memory, while int8 quarters it.
+QUANTIZATIONS = ('float32', 'int8')
+CHUNK_BYTES = 128 * 1024  # float32 rows widened at a time during a scan (stays in L2)
+
+
+def _chunk_rows(dim):
+    return max(1, CHUNK_BYTES // (4 * dim))
+
+
+def _check(dtype):
+    if dtype not in QUANTIZATIONS:
+        raise ValueError(f"Unknown quantization '{dtype}', expected one of {QUANTIZATIONS}")
+
+
+def quantize_rows(vectors, dtype='int8'):
+    """
+    Quantize a (N, D) float matrix row by row
+
+    Returns:
+        (codes, scales): codes has the requested dtype; scales is a float32
+        per-row factor for int8 (row ≈ codes * scale) and None otherwise
+    """
+    _check(dtype)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype == 'float32':
+        return np.ascontiguousarray(vectors), None
+    scales = np.abs(vectors).max(axis=1) / 127.0 if len(vectors) else np.zeros(0, dtype=np.float32)
+    scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def dequantize_rows(codes, scales=None):
+    """float32 rows back from quantize_rows() output"""
+    if codes.dtype == np.float32:
+        return codes
+    rows = codes.astype(np.float32)
+    if scales is not None:
+        rows *= scales[:, None]
+    return rows
+
+
+def quantized_norms_sq(codes, scales=None):
+    """Squared norms of the dequantized rows"""
+    norms_sq = np.zeros(len(codes), dtype=np.float32)
+    chunk_rows = _chunk_rows(codes.shape[1])
+    for start in range(0, len(codes), chunk_rows):
+        rows = dequantize_rows(codes[start:start + chunk_rows],
+                               None if scales is None else scales[start:start + chunk_rows])
+        norms_sq[start:start + len(rows)] = np.einsum('ij,ij->i', rows, rows)
+    return norms_sq
+
+
+def quantized_dot(queries, codes, scales=None):
+    """
+    (F, D) float32 queries · (N, D) quantized rows -> (F, N) float32
+
+    Each chunk of int8 rows is widened into one reused float32 buffer and
+    multiplied in float32 (BLAS); the per-row scale is applied to the result.
+    The widening is the cost over a float32 scan: about 2x per query on the
+    512-d index in bench_quantization, while the memory-bound 128-d gallery
+    scan gets faster because it reads a quarter of the bytes.
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    if codes.dtype == np.float32:
+        return queries @ codes.T
+    out = np.empty((len(queries), len(codes)), dtype=np.float32)
+    chunk_rows = _chunk_rows(codes.shape[1])
+    buffer = np.empty((min(chunk_rows, len(codes)), codes.shape[1]), dtype=np.float32)
+    for start in range(0, len(codes), chunk_rows):
+        chunk = codes[start:start + chunk_rows]
+        rows = buffer[:len(chunk)]
+        np.copyto(rows, chunk, casting='unsafe')
+        block = out[:, start:start + len(chunk)]
+        np.matmul(queries, rows.T, out=block)
+        if scales is not None:
+            block *= scales[start:start + len(chunk)]
+    return out
@@ -0,0 +1,64 @@
+"""
+Per-schedule candidate galleries for live recognition
+A LiveDetection session for one class only needs to search that class's students first
+"""
+import threading
+
+from barkwear2.utils.db import db
+
+ROSTER_QUERY = """
+    SELECT s.student_id
+    FROM students s
+    JOIN schedules sc ON sc.block = s.block AND sc.year_level = s.year_level
+    WHERE sc.schedule_id = %s AND s.is_active = TRUE
+"""
+
+
+class RosterGalleryCache:
+    """
+    schedule_id -> roster (student IDs) -> sub-gallery of the live face gallery
+
+    Rosters are cached until invalidate() is called (students or schedules
+    changed). Sub-galleries are also rebuilt whenever the full gallery object
+    is replaced by a reload.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rosters = {}    # {schedule_id: frozenset of student IDs}
+        self._galleries = {}  # {schedule_id: (full gallery it was cut from, sub-gallery)}
+
+    def roster(self, schedule_id):
+        with self._lock:
+            roster = self._rosters.get(schedule_id)
+        if roster is None:
+            rows = db.execute_query(ROSTER_QUERY, (schedule_id,))
+            roster = frozenset(row['student_id'] for row in rows)
+            with self._lock:
+                self._rosters[schedule_id] = roster
+        return roster
+
+    def gallery_for(self, schedule_id, gallery):
+        """Sub-gallery of `gallery` for the schedule's roster"""
+        with self._lock:
+            cached = self._galleries.get(schedule_id)
+        if cached is not None and cached[0] is gallery:
+            return cached[1]
+
+        sub_gallery = gallery.subset(self.roster(schedule_id))
+        with self._lock:
+            self._galleries[schedule_id] = (gallery, sub_gallery)
+        return sub_gallery
+
+    def invalidate(self, schedule_id=None):
+        """Forget one schedule's roster, or all of them"""
+        with self._lock:
+            if schedule_id is None:
+                self._rosters.clear()
+                self._galleries.clear()
+            else:
+                self._rosters.pop(schedule_id, None)
+                self._galleries.pop(schedule_id, None)
+
+
+roster_cache = RosterGalleryCache()
@@ -0,0 +1,118 @@
+"""
+Per-camera static-scene gate for /detect
+When a frame barely differs from the last fully processed one, its result is reused
+"""
+import threading
+
+import cv2
+import numpy as np
+
+from barkwear2.config import Config
+from barkwear2.services.session_cache import TTLCache
+
+
+class StaticSceneCache:
+    """
+    Each camera keeps the downscaled grayscale of its last fully processed
+    frame and the response computed for it. A new frame is compared against
+    that reference (not the previous frame, so slow drift still adds up):
+    pixels whose difference exceeds `pixel_delta` count as changed, and if
+    fewer than `changed_ratio` of them changed the cached response is served.
+
+    A reference is reused at most `max_reuse` times in a row and expires
+    after `ttl` seconds idle, so a cached answer never goes stale for long.
+    Results computed with different request parameters (threshold, schedule)
+    are never reused.
+
+    Cached responses name students, so every change to the face gallery or
+    a roster calls invalidate(). A response computed before an invalidation
+    is not stored after it (see `generation`).
+    """
+
+    def __init__(self, max_side=96, pixel_delta=20, changed_ratio=0.02, max_reuse=15, max_cameras=64, ttl=10.0):
+        self.max_side = max_side
+        self.pixel_delta = pixel_delta
+        self.changed_ratio = changed_ratio
+        self.max_reuse = max_reuse
+        self._cameras = TTLCache(maxsize=max_cameras, ttl=ttl)  # {camera: {'ref', 'params', 'result', 'reused'}}
+        self._lock = threading.Lock()
+        self.generation = 0  # bumped by invalidate()
+        self.stats = {'frames': 0, 'hits': 0, 'miss_no_reference': 0, 'miss_changed': 0, 'miss_params': 0,
+                      'miss_max_reuse': 0, 'invalidations': 0}
+
+    def thumbnail(self, bgr):
+        """Small blurred grayscale used for the comparison (blur absorbs sensor noise)"""
+        factor = min(1.0, self.max_side / max(bgr.shape[:2]))
+        small = cv2.resize(bgr, (max(1, int(bgr.shape[1] * factor)), max(1, int(bgr.shape[0] * factor))),
+                           interpolation=cv2.INTER_AREA) if factor < 1.0 else bgr
+        return cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (3, 3), 0)
+
+    def changed_fraction(self, thumb, reference):
+        return float(np.count_nonzero(cv2.absdiff(thumb, reference) > self.pixel_delta)) / thumb.size
+
+    def _count(self, outcome):
+        with self._lock:
+            self.stats['frames'] += 1
+            self.stats[outcome] += 1
+
+    def lookup(self, key, thumb, params=None):
+        """
+        Cached response for this camera if the scene is unchanged, else None
+
+        Args:
+            key: Camera id
+            thumb: thumbnail() of the new frame
+            params: Request parameters the response depends on
+        """
+        entry = self._cameras.get(key)
+        if entry is None or entry['ref'].shape != thumb.shape:
+            self._count('miss_no_reference')
+            return None
+        if entry['params'] != params:
+            self._count('miss_params')
+            return None
+        if entry['reused'] >= self.max_reuse:
+            self._count('miss_max_reuse')
+            return None
+        if self.changed_fraction(thumb, entry['ref']) >= self.changed_ratio:
+            self._count('miss_changed')
+            return None
+        entry['reused'] += 1
+        self._count('hits')
+        return entry['result']
+
+    def store(self, key, thumb, result, params=None, generation=None):
+        """
+        Make this frame the camera's new reference
+
+        Args:
+            generation: `generation` read before computing `result`; if the
+                cache was invalidated since, the result is dropped
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._cameras.set(key, {'ref': thumb, 'params': params, 'result': result, 'reused': 0})
+
+    def invalidate(self):
+        """Forget every camera's cached response (gallery or roster changed)"""
+        with self._lock:
+            self.generation += 1
+            self.stats['invalidations'] += 1
+            self._cameras.clear()
+
+    def snapshot(self):
+        """Counters plus hit rate, for /health"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats['hit_rate'] = round(stats['hits'] / stats['frames'], 3) if stats['frames'] else 0.0
+        stats['cameras'] = len(self._cameras)
+        return stats
+
+
+scene_cache = StaticSceneCache(
+    pixel_delta=Config.SCENE_CACHE_PIXEL_DELTA,
+    changed_ratio=Config.SCENE_CACHE_CHANGED_RATIO,
+    max_reuse=Config.SCENE_CACHE_MAX_REUSE,
+    ttl=Config.SCENE_CACHE_TTL
+)
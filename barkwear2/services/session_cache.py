@@ -0,0 +1,62 @@
+"""
+Small thread-safe LRU cache with per-entry TTL
+Used for per-camera / per-capture-session state so memory stays bounded
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    At most `maxsize` entries; entries not touched for `ttl` seconds expire.
+    get() refreshes an entry's age and LRU position.
+    """
+
+    def __init__(self, maxsize=64, ttl=60.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # {key: (last_used, value)}
+
+    def _expire(self, now):
+        while self._data:
+            key, (last_used, _) = next(iter(self._data.items()))
+            if now - last_used <= self.ttl:
+                break
+            del self._data[key]
+
+    def get(self, key, default=None):
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            item = self._data.get(key)
+            if item is None:
+                return default
+            self._data[key] = (now, item[1])
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key, value):
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            self._data[key] = (now, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        with self._lock:
+            self._expire(self._clock())
+            return len(self._data)
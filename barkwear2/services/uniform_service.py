@@ -9,7 +9,7 @@ import os
 
 class UniformDetectionService:
     def __init__(self):
-        self.model_path = Config.YOLO_MODEL_PATH
+        self.model_path = Config.uniform_model_path()
         self.model = None
         self._load_model()
         
@@ -20,7 +20,7 @@ class UniformDetectionService:
         """Load YOLOv8 model"""
         if os.path.exists(self.model_path):
             try:
-                self.model = YOLO(self.model_path)
+                self.model = YOLO(self.model_path, task='detect')
                 print(f"✅ YOLO model loaded from {self.model_path}")
             except Exception as e:
                 print(f"❌ Error loading YOLO model: {e}")
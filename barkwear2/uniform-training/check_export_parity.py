@@ -0,0 +1,158 @@
+"""
+Parity check: exported uniform detector (ONNX / OpenVINO) vs the PyTorch best.pt
+Runs every model on the validation images from uniform_data.yaml, checks the
+detections match within tolerance and reports CPU latency for each backend.
+
+Usage (from uniform-training/):
+    python check_export_parity.py
+    python check_export_parity.py --images my_new_images --iou-tol 0.85
+Exits with status 1 if any backend falls below --min-match.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import yaml
+from ultralytics import YOLO
+
+DEFAULT_WEIGHTS = 'runs/detect/uniform_detector_v2/weights/best.pt'
+EXPORTS = {
+    'onnx': 'best.onnx',
+    'openvino': 'best_openvino_model',
+}
+
+
+def val_images(yaml_path='uniform_data.yaml', images_dir=None, limit=None):
+    """Validation image paths (from the dataset yaml unless a folder is given)"""
+    if images_dir is None:
+        with open(yaml_path, 'r') as f:
+            data = yaml.safe_load(f)
+        images_dir = Path(data['path']) / data['val']
+    paths = sorted(str(p) for p in Path(images_dir).iterdir()
+                   if p.suffix.lower() in ('.jpg', '.jpeg', '.png'))
+    return paths[:limit] if limit else paths
+
+
+def detections(model, image, conf):
+    result = model(image, conf=conf, verbose=False)[0]
+    boxes = result.boxes
+    return list(zip(
+        boxes.cls.cpu().numpy().astype(int),
+        boxes.conf.cpu().numpy(),
+        boxes.xyxy.cpu().numpy()
+    ))
+
+
+def iou(a, b):
+    x1, y1 = max(a[0], b[0]), max(a[1], b[1])
+    x2, y2 = min(a[2], b[2]), min(a[3], b[3])
+    inter = max(0.0, x2 - x1) * max(0.0, y2 - y1)
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def compare(reference, candidate, conf, iou_tol, conf_tol):
+    """
+    (matched, total) detections for one image. Detections whose confidence is
+    within conf_tol of the threshold may legitimately appear on one side only,
+    so they are not counted.
+    """
+    matched, total, used = 0, 0, set()
+    for cls, score, box in reference:
+        borderline = abs(score - conf) <= conf_tol
+        best, best_iou = None, 0.0
+        for j, (c_cls, c_score, c_box) in enumerate(candidate):
+            if j in used or c_cls != cls:
+                continue
+            overlap = iou(box, c_box)
+            if overlap > best_iou:
+                best, best_iou = j, overlap
+        ok = best is not None and best_iou >= iou_tol and abs(candidate[best][1] - score) <= conf_tol
+        if ok:
+            used.add(best)
+        if borderline and not ok:
+            continue
+        total += 1
+        matched += ok
+    extra = sum(1 for j, (_, score, _) in enumerate(candidate)
+                if j not in used and abs(score - conf) > conf_tol)
+    return matched, total + extra
+
+
+def latency_ms(model, images, warmup=3):
+    for image in images[:warmup]:
+        model(image, verbose=False)
+    times = []
+    for image in images:
+        start = time.perf_counter()
+        model(image, verbose=False)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.mean(times), statistics.median(times)
+
+
+def run_parity(weights, image_paths, conf, iou_tol, conf_tol):
+    images = [img for img in (cv2.imread(p) for p in image_paths) if img is not None]
+    weights_dir = os.path.dirname(weights)
+    backends = {'pytorch': YOLO(weights)}
+    for fmt, name in EXPORTS.items():
+        path = os.path.join(weights_dir, name)
+        if os.path.exists(path):
+            backends[fmt] = YOLO(path, task='detect')
+        else:
+            print(f"⚠️ No {fmt} export at {path} — run export_uniform.py first")
+
+    reference = [detections(backends['pytorch'], image, conf) for image in images]
+    report = {}
+    for fmt, model in backends.items():
+        matched = total = 0
+        if fmt != 'pytorch':
+            for image, ref in zip(images, reference):
+                m, t = compare(ref, detections(model, image, conf), conf, iou_tol, conf_tol)
+                matched += m
+                total += t
+        mean_ms, p50_ms = latency_ms(model, images)
+        report[fmt] = {
+            'match': 1.0 if fmt == 'pytorch' else (matched / total if total else 1.0),
+            'detections': sum(len(r) for r in reference) if fmt == 'pytorch' else total,
+            'mean_ms': mean_ms,
+            'p50_ms': p50_ms,
+        }
+    return len(images), report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare exported uniform detectors against best.pt')
+    parser.add_argument('--weights', default=DEFAULT_WEIGHTS)
+    parser.add_argument('--data', default='uniform_data.yaml')
+    parser.add_argument('--images', default=None, help='Image folder instead of the yaml val split')
+    parser.add_argument('--limit', type=int, default=None)
+    parser.add_argument('--conf', type=float, default=0.5, help='Same threshold as /detect')
+    parser.add_argument('--iou-tol', type=float, default=0.9, help='Min IoU for a box to count as the same')
+    parser.add_argument('--conf-tol', type=float, default=0.05, help='Max confidence difference')
+    parser.add_argument('--min-match', type=float, default=0.98)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.weights):
+        print(f"❌ Weights not found at: {args.weights}")
+        sys.exit(1)
+
+    n_images, report = run_parity(args.weights, val_images(args.data, args.images, args.limit),
+                                  args.conf, args.iou_tol, args.conf_tol)
+
+    print(f"\n📊 Parity on {n_images} image(s) (conf={args.conf}, IoU ≥ {args.iou_tol}, "
+          f"Δconf ≤ {args.conf_tol})")
+    print(f"{'backend':>9} | {'match':>6} | {'dets':>5} | {'mean ms':>8} | {'p50 ms':>7} | {'speedup':>7}")
+    print('-' * 58)
+    base_ms = report['pytorch']['mean_ms']
+    failed = False
+    for fmt, r in report.items():
+        ok = r['match'] >= args.min_match
+        failed |= not ok
+        print(f"{fmt:>9} | {r['match']:>6.3f} | {r['detections']:>5} | {r['mean_ms']:>8.1f} | "
+              f"{r['p50_ms']:>7.1f} | {base_ms / r['mean_ms']:>6.2f}x {'✅' if ok else '❌'}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,67 @@
+"""
+Export the trained uniform detector for CPU serving
+Writes best.onnx (ONNX Runtime) and/or best_openvino_model/ (OpenVINO IR) next to best.pt
+
+Usage (from uniform-training/):
+    python export_uniform.py                      # both formats
+    python export_uniform.py --formats onnx
+Then set UNIFORM_MODEL_FORMAT in config.py (or BARKWEAR_UNIFORM_FORMAT) to serve it,
+and run check_export_parity.py to compare it against best.pt.
+"""
+
+import argparse
+import os
+
+import yaml
+from ultralytics import YOLO
+
+DEFAULT_WEIGHTS = 'runs/detect/uniform_detector_v2/weights/best.pt'
+
+
+def training_imgsz(weights_path, default=640):
+    """imgsz the model was trained at, from the run's args.yaml"""
+    args_path = os.path.join(os.path.dirname(os.path.dirname(weights_path)), 'args.yaml')
+    if os.path.exists(args_path):
+        with open(args_path, 'r') as f:
+            return int(yaml.safe_load(f).get('imgsz', default))
+    return default
+
+
+def export_model(weights_path, formats=('onnx', 'openvino'), imgsz=None):
+    """Export best.pt to each format; returns {format: exported path}"""
+    if not os.path.exists(weights_path):
+        print(f"❌ Weights not found at: {weights_path}")
+        return {}
+
+    imgsz = imgsz or training_imgsz(weights_path)
+    exported = {}
+    for fmt in formats:
+        print(f"\n📦 Exporting {weights_path} → {fmt} (imgsz={imgsz})...")
+        model = YOLO(weights_path)
+        # dynamic=True keeps the batch axis free so the /detect micro-batcher can send several frames
+        if fmt == 'onnx':
+            path = model.export(format='onnx', imgsz=imgsz, dynamic=True, simplify=True)
+        else:
+            path = model.export(format='openvino', imgsz=imgsz, dynamic=True)
+        exported[fmt] = path
+        print(f"✅ {fmt}: {path}")
+    return exported
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export the uniform detector to ONNX / OpenVINO')
+    parser.add_argument('--weights', default=DEFAULT_WEIGHTS)
+    parser.add_argument('--formats', nargs='+', default=['onnx', 'openvino'], choices=['onnx', 'openvino'])
+    parser.add_argument('--imgsz', type=int, default=None, help='Defaults to the training imgsz')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("📦 UNIFORM DETECTOR EXPORT")
+    print("=" * 60)
+    exported = export_model(args.weights, args.formats, args.imgsz)
+    if exported:
+        print("\n💡 Next steps:")
+        print("   1. python check_export_parity.py   (detections + latency vs best.pt)")
+        print("   2. Set UNIFORM_MODEL_FORMAT = 'onnx' or 'openvino' in config.py")
+        print("   3. Optional: python quantize_uniform.py   (INT8, checks mAP against best.pt)")
+    print("=" * 60)
@@ -0,0 +1,152 @@
+"""
+INT8 post-training quantization of the uniform detector
+Calibrates on images listed in uniform_data.yaml, then re-validates the INT8
+model next to fp32 best.pt (mAP50, mAP50-95) and compares CPU latency.
+
+Usage (from uniform-training/):
+    python quantize_uniform.py                     # ONNX Runtime static INT8 -> best_int8.onnx
+    python quantize_uniform.py --backend openvino  # OpenVINO / NNCF INT8 -> best_int8_openvino_model/
+Then set UNIFORM_MODEL_FORMAT = 'onnx_int8' or 'openvino_int8' in config.py.
+"""
+
+import argparse
+import os
+import random
+
+import cv2
+import numpy as np
+import yaml
+from ultralytics import YOLO
+
+from check_export_parity import DEFAULT_WEIGHTS, latency_ms, val_images
+from export_uniform import export_model, training_imgsz
+
+
+def letterbox(image, size):
+    """Same resize + grey padding ultralytics applies before inference, as a 1x3xHxW float tensor"""
+    h, w = image.shape[:2]
+    scale = min(size / h, size / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    resized = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    top, left = (size - new_h) // 2, (size - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = resized
+    rgb = cv2.cvtColor(canvas, cv2.COLOR_BGR2RGB)
+    return rgb.transpose(2, 0, 1)[None].astype(np.float32) / 255.0
+
+
+def calibration_images(data_yaml, split, count, seed=0):
+    """Random sample of `count` images from a split of the dataset yaml"""
+    with open(data_yaml, 'r') as f:
+        data = yaml.safe_load(f)
+    paths = val_images(data_yaml, os.path.join(data['path'], data[split]))
+    random.Random(seed).shuffle(paths)
+    return paths[:count]
+
+
+def quantize_onnx(weights_path, data_yaml, split, count, imgsz):
+    """ONNX Runtime static (QDQ, per-channel) INT8 from the fp32 ONNX export"""
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    fp32_path = os.path.join(os.path.dirname(weights_path), 'best.onnx')
+    if not os.path.exists(fp32_path):
+        export_model(weights_path, ['onnx'], imgsz)
+
+    class UniformCalibration(CalibrationDataReader):
+        def __init__(self, paths, input_name):
+            self.paths = iter(paths)
+            self.input_name = input_name
+
+        def get_next(self):
+            for path in self.paths:
+                image = cv2.imread(path)
+                if image is not None:
+                    return {self.input_name: letterbox(image, imgsz)}
+            return None
+
+    import onnx
+    input_name = onnx.load(fp32_path).graph.input[0].name
+    paths = calibration_images(data_yaml, split, count)
+    print(f"\n🎯 Calibrating ONNX INT8 on {len(paths)} {split} image(s)...")
+
+    int8_path = os.path.join(os.path.dirname(weights_path), 'best_int8.onnx')
+    quantize_static(
+        fp32_path,
+        int8_path,
+        UniformCalibration(paths, input_name),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        # Box decoding mixes pixel coordinates with 0-1 class scores in one
+        # tensor, which a single INT8 scale cannot cover — keep it fp32
+        nodes_to_exclude=_head_nodes(fp32_path),
+    )
+    return int8_path
+
+
+def _head_nodes(onnx_path):
+    """Decoding ops of the Detect head (anchors, DFL, concat) — its convs still go INT8"""
+    import onnx
+    graph = onnx.load(onnx_path).graph
+    output = graph.output[0].name
+    last = next((node for node in graph.node if output in node.output), None)
+    if last is None or not last.name.startswith('/model.'):
+        return []
+    prefix = last.name.rsplit('/', 1)[0] + '/'  # e.g. '/model.22/'
+    return [node.name for node in graph.node if node.name.startswith(prefix) and node.op_type != 'Conv']
+
+
+def quantize_openvino(weights_path, data_yaml, imgsz):
+    """OpenVINO INT8 via ultralytics' NNCF export (calibrates on the yaml's dataset)"""
+    print(f"\n🎯 Calibrating OpenVINO INT8 on {data_yaml}...")
+    return YOLO(weights_path).export(format='openvino', imgsz=imgsz, int8=True, data=data_yaml)
+
+
+def validate(model_path, data_yaml, imgsz):
+    metrics = YOLO(model_path, task='detect').val(data=data_yaml, imgsz=imgsz, batch=1, plots=False,
+                                                  verbose=False)
+    return metrics.box.map50, metrics.box.map
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='INT8 post-training quantization of the uniform detector')
+    parser.add_argument('--weights', default=DEFAULT_WEIGHTS)
+    parser.add_argument('--data', default='uniform_data.yaml')
+    parser.add_argument('--backend', default='onnx', choices=['onnx', 'openvino'])
+    parser.add_argument('--calib-split', default='train', help='Dataset split to calibrate on (onnx)')
+    parser.add_argument('--calib-size', type=int, default=200, help='Calibration images (onnx)')
+    parser.add_argument('--limit', type=int, default=50, help='Val images for the latency comparison')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🗜️ UNIFORM DETECTOR INT8 QUANTIZATION")
+    print("=" * 60)
+
+    if not os.path.exists(args.weights):
+        print(f"❌ Weights not found at: {args.weights}")
+        raise SystemExit(1)
+
+    imgsz = training_imgsz(args.weights)
+    if args.backend == 'onnx':
+        int8_path = quantize_onnx(args.weights, args.data, args.calib_split, args.calib_size, imgsz)
+    else:
+        int8_path = quantize_openvino(args.weights, args.data, imgsz)
+    print(f"✅ INT8 model: {int8_path}")
+
+    print("\n🧪 Validating fp32 and INT8...")
+    fp32_map50, fp32_map = validate(args.weights, args.data, imgsz)
+    int8_map50, int8_map = validate(int8_path, args.data, imgsz)
+
+    images = [img for img in (cv2.imread(p) for p in val_images(args.data, limit=args.limit)) if img is not None]
+    fp32_ms, _ = latency_ms(YOLO(args.weights), images)
+    int8_ms, _ = latency_ms(YOLO(int8_path, task='detect'), images)
+
+    print(f"\n📊 Results ({args.backend}, imgsz={imgsz}, {len(images)} latency image(s)):")
+    print(f"{'model':>6} | {'mAP50':>6} | {'mAP50-95':>8} | {'CPU ms':>7}")
+    print('-' * 38)
+    print(f"{'fp32':>6} | {fp32_map50:>6.3f} | {fp32_map:>8.3f} | {fp32_ms:>7.1f}")
+    print(f"{'int8':>6} | {int8_map50:>6.3f} | {int8_map:>8.3f} | {int8_ms:>7.1f}")
+    print(f"   Δ mAP50 {int8_map50 - fp32_map50:+.3f}, Δ mAP50-95 {int8_map - fp32_map:+.3f}, "
+          f"{fp32_ms / int8_ms:.2f}x faster")
+    print("=" * 60)